@@ -1,7 +1,7 @@
 
 from testing_summary.model_langChain import YouTubeVideoSummarizer
 from testing_quiz.model_quiz import QuizGenerator
-from testing_chatbot.rag.utils_youtube import load_transcript
+from testing_chatbot.rag.utils_youtube import load_segments
 from typing import Tuple
 from langchain_core.messages.ai import AIMessage
 from testing_chatbot.rag.utils_rag import *
@@ -11,15 +11,15 @@ class ModelCalling:
         pass
     
     def generate_summary(self, url: str) -> Tuple[AIMessage, "VideoSummary", dict]:
-        transcripts = load_transcript(url=url)
+        segments = load_segments(url=url)
         summarizer = YouTubeVideoSummarizer()
-        response, parsed_output, summary = summarizer.summarize_video(transcripts)
+        response, parsed_output, summary = summarizer.summarize_video(segments)
         return response, parsed_output, summary
     
     def generate_quiz(self , url : str) :
-        transcripts = load_transcript(url=url)
+        segments = load_segments(url=url)
         quiz_gen = QuizGenerator()
-        response = quiz_gen.generate_quiz(transcripts)
+        response = quiz_gen.generate_quiz(segments)
         return response
     
         
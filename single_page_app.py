@@ -7,22 +7,27 @@ from langchain_core.messages import HumanMessage, AIMessage
 
 # Chatbot imports
 from testing_chatbot.rag.yt_rag_model import build_chatbot, retrieve_all_threads
-from testing_chatbot.rag.utils_youtube import get_embed_url, load_transcript
-from testing_chatbot.rag.utils_database import save_youtube_url_to_db, delete_all_threads_from_db, save_captions_to_db
+from testing_chatbot.rag.utils_youtube import get_embed_url, load_transcript, load_llm_transcript, extract_video_id
+from testing_chatbot.rag.utils_database import save_youtube_url_to_db, delete_all_threads_from_db
 from testing_chatbot.rag.utils_st_sessions import reset_chat, sidebar_thread_selection, add_threadId_to_chatThreads
-from testing_chatbot.rag.utils_rag import text_splitter, generate_embeddings, retriever_docs, save_embeddings_faiss, clear_faiss_indexes
+from testing_chatbot.rag.utils_rag import index_video_shared, video_retriever, clear_faiss_indexes
+from testing_chatbot.rag.utils_chunking import iter_video_chunks, video_transcript_hash
+from testing_chatbot.rag.utils_embeddings import warmup_embeddings
+from testing_chatbot.rag.utils_background_writer import persist_in_background
+from testing_chatbot.rag.utils_video_registry import link_thread_to_video, get_or_create_video_artifact, save_video_artifact
 
 # Quiz imports
 from testing_quiz.model_quiz import QuizGenerator
-from testing_quiz.utils import save_quiz_to_db, load_quiz_from_db
+from testing_quiz.model_quiz import QuizList
+from testing_quiz.utils import load_quiz_from_db
 
 # Summary imports
 from testing_summary.test_model import generate_summary
-from testing_summary.utlis_db import extract_topics_from_db, save_summary_to_db, get_summary_if_exists
+from testing_summary.utlis_db import extract_topics_from_db, get_summary_if_exists
 
 # Topics imports
-from testing_TopicsTimestamps.model import extract_topics_from_transcript, parse_transcript
-from testing_TopicsTimestamps.utils_db import save_topics_to_db, load_topics_from_db
+from testing_TopicsTimestamps.model import extract_topics_from_transcript, TopicsOutput
+from testing_TopicsTimestamps.utils_db import load_topics_from_db
 
 # Load environment variables
 load_dotenv()
@@ -40,25 +45,27 @@ st.set_page_config(
 # =============================================================================
 # CACHING FUNCTIONS
 # =============================================================================
+@st.cache_resource(show_spinner=False)
+def warm_embedding_model():
+    """Load the shared embedding model once per server process, in the background."""
+    return warmup_embeddings(background=True)
+
+warm_embedding_model()
+
 @st.cache_data(show_spinner=False)
 def cached_load_transcript(url: str):
     """Cache YouTube transcript."""
     return load_transcript(url)
 
-@st.cache_data(show_spinner=False)
-def cached_text_splitter(captions: list):
-    """Cache text splitting."""
-    return text_splitter(captions)
-
 @st.cache_resource(show_spinner=False)
-def cached_generate_embeddings(_chunks: list):
-    """Cache embeddings."""
-    return generate_embeddings(_chunks)
+def cached_generate_embeddings(video_id: str, transcript_digest: str, _chunks):
+    """Add the video to the shared index once per transcript (every thread on that video shares its vectors)."""
+    return index_video_shared(video_id, _chunks)
 
 @st.cache_resource(show_spinner=False)
-def cached_retriever(_vector_store):
-    """Cache retriever object."""
-    return retriever_docs(_vector_store)
+def cached_retriever(video_id: str, thread_id=None):
+    """Cache retriever object (one per conversation, with its own retrieval cache)."""
+    return video_retriever(video_id, thread_id=thread_id)
 
 @st.cache_resource(show_spinner=False)
 def cached_build_chatbot(retriever=None):
@@ -72,17 +79,15 @@ def clear_model_cache():
 
 @st.cache_data(show_spinner=True)
 def get_transcript(url: str):
-    captions = load_transcript(url)
-    segments = parse_transcript(captions)
-    return ["[" + str(s.start_time) + "s] " + s.text for s in segments]
+    return load_llm_transcript(url)
 
 @st.cache_data(show_spinner=True)
 def get_topics_summary(formatted_text: str):
-    return extract_topics_from_transcript(" ".join(formatted_text))
+    return extract_topics_from_transcript(formatted_text)
 
 @st.cache_data
 def get_captions(youtube_url: str):
-    return load_transcript(youtube_url)
+    return load_llm_transcript(youtube_url)
 
 @st.cache_resource
 def get_quiz(captions):
@@ -332,6 +337,7 @@ elif st.session_state.current_page == "SmartSummary":
         if not thread_id.strip():
             st.warning("⚠️ Please enter a Thread ID.")
         else:
+            video_id = link_thread_to_video(thread_id, url_input) if url_input.strip() else None
             topics_text = extract_topics_from_db(thread_id)
             
             existing_summary = get_summary_if_exists(thread_id)
@@ -343,7 +349,7 @@ elif st.session_state.current_page == "SmartSummary":
                 transcript_text = ""
                 if url_input.strip():
                     with st.spinner("Fetching transcript..."):
-                        transcript_text = load_transcript(url_input)
+                        transcript_text = load_llm_transcript(url_input)
                         if transcript_text is None:
                             st.error("❌ Could not fetch transcript for this video.")
                             transcript_text = ""
@@ -355,7 +361,7 @@ elif st.session_state.current_page == "SmartSummary":
                 else:
                     with st.spinner("Generating summary..."):
                         summary = generate_summary(transcript_text, topics_text)
-                        save_summary_to_db(thread_id, summary)
+                        save_video_artifact(video_id, "summary", summary)
                     
                     st.subheader("✅ Summary")
                     st.write(summary)
@@ -370,14 +376,17 @@ elif st.session_state.current_page == "TimelineTopics":
     thread_id = st.text_input("Enter Thread ID:")
     
     if youtube_url and thread_id:
+        video_id = link_thread_to_video(thread_id, youtube_url)
         output = load_topics_from_db(thread_id)
         if output:
             st.success("✅ Topics loaded from DB!")
         else:
             st.info("⏳ Fetching transcript...")
-            formatted = get_transcript(youtube_url)
-            output = get_topics_summary(formatted)
-            save_topics_to_db(thread_id, output.model_dump_json())
+            topics_json = get_or_create_video_artifact(
+                video_id, "topics",
+                lambda: get_topics_summary(get_transcript(youtube_url)).model_dump_json()
+            )
+            output = TopicsOutput.model_validate_json(topics_json)
             st.success("✅ Topics extracted & saved to DB!")
         
         embed_url = get_embed_url(youtube_url)
@@ -466,13 +475,14 @@ elif st.session_state.current_page == "LectureChat":
         
         with st.spinner("⏳ Processing..."):
             status_box.info("🔄 Splitting text into chunks...")
-            chunks = cached_text_splitter(youtube_captions)
+            video_id = extract_video_id(st.session_state['youtube_url'])
+            chunks = iter_video_chunks(video_id)  # persisted per (video, chunker config); consumed while embedding
             
             status_box.info("✅ Text split into chunks\n\n🔄 Generating embeddings...")
-            vector_store = cached_generate_embeddings(chunks)
+            cached_generate_embeddings(video_id, video_transcript_hash(video_id), chunks)
             
             status_box.info("✅ Embeddings generated\n\n🔄 Creating retriever...")
-            retriever = cached_retriever(vector_store)
+            retriever = cached_retriever(video_id, thread_id_input)
         
         status_box.success("🎉 Chatbot ready!")
     
@@ -517,10 +527,10 @@ elif st.session_state.current_page == "LectureChat":
         if user_input:
             if st.session_state['message_history'] == []:
                 add_threadId_to_chatThreads(thread_id=thread_id_input)
-                with st.spinner("saving into FAISS"):
-                    save_embeddings_faiss(thread_id=thread_id_input, vector_store=vector_store)
-                    save_youtube_url_to_db(thread_id=thread_id_input, youtube_url=input_url)
-                    save_captions_to_db(thread_id=thread_id_input, captions=youtube_captions)
+                # Index and transcript are owned by the video; the thread just points at it.
+                # Saved on the background writer so the answer starts streaming right away
+                persist_in_background(f"youtube_url:{thread_id_input}", save_youtube_url_to_db,
+                                      thread_id=thread_id_input, youtube_url=input_url)
             
             st.session_state['message_history'].append({"role": "user", "content": user_input})
             
@@ -582,6 +592,7 @@ elif st.session_state.current_page == "KnowledgeQuiz":
     embed_url = get_embed_url(youtube_url)
     
     if thread_id and youtube_url:
+        video_id = link_thread_to_video(thread_id, youtube_url)
         quiz_list = load_quiz_from_db(thread_id)
         if quiz_list:
             st.success("✅ Quiz loaded from DB!")
@@ -590,8 +601,10 @@ elif st.session_state.current_page == "KnowledgeQuiz":
             captions = get_captions(youtube_url)
             
             if captions:
-                quiz_list = get_quiz(captions)
-                save_quiz_to_db(thread_id, quiz_list.model_dump_json())
+                quiz_json = get_or_create_video_artifact(
+                    video_id, "quiz", lambda: get_quiz(captions).model_dump_json()
+                )
+                quiz_list = QuizList.model_validate_json(quiz_json)
                 st.success("✅ Quiz generated! and Saved to DB!")
         
         if "play_index" not in st.session_state:
@@ -1,10 +1,13 @@
 import streamlit as st
 from langchain_core.messages import HumanMessage , AIMessage
 from testing_chatbot.rag.yt_rag_model import build_chatbot , retrieve_all_threads  
-from testing_chatbot.rag.utils_youtube import get_embed_url , load_transcript
-from testing_chatbot.rag.utils_database import  save_youtube_url_to_db , delete_all_threads_from_db , save_captions_to_db
+from testing_chatbot.rag.utils_youtube import get_embed_url , load_transcript , extract_video_id
+from testing_chatbot.rag.utils_database import  save_youtube_url_to_db , delete_all_threads_from_db
 from testing_chatbot.rag.utils_st_sessions import reset_chat , sidebar_thread_selection , add_threadId_to_chatThreads
-from testing_chatbot.rag.utils_rag import text_splitter , generate_embeddings , retriever_docs , save_embeddings_faiss ,clear_faiss_indexes
+from testing_chatbot.rag.utils_rag import index_video_shared , video_retriever ,clear_faiss_indexes
+from testing_chatbot.rag.utils_chunking import iter_video_chunks, video_transcript_hash
+from testing_chatbot.rag.utils_embeddings import warmup_embeddings
+from testing_chatbot.rag.utils_background_writer import persist_in_background
 st.set_page_config(
     page_title="LectureChat",
     page_icon="💬",
@@ -16,28 +19,30 @@ st.set_page_config(
 # ADD CACHING WRAPPERS
 # =============================================================================
 
+@st.cache_resource(show_spinner=False)
+def warm_embedding_model():
+    """Load the shared embedding model once per server process, in the background."""
+    return warmup_embeddings(background=True)
+
+warm_embedding_model()
+
+
 @st.cache_data(show_spinner=False)
 def cached_load_transcript(url: str):
     """Cache YouTube transcript so it doesn’t reload each rerun."""
     return load_transcript(url)
 
 
-@st.cache_data(show_spinner=False)
-def cached_text_splitter(captions: list):
-    """Cache text splitting to avoid recomputation."""
-    return text_splitter(captions)
-
-
 @st.cache_resource(show_spinner=False)
-def cached_generate_embeddings(_chunks: list):
-    """Cache embeddings since it is expensive."""
-    return generate_embeddings(_chunks)
+def cached_generate_embeddings(video_id: str, transcript_digest: str, _chunks):
+    """Add the video to the shared index once per transcript (every thread on that video shares its vectors)."""
+    return index_video_shared(video_id, _chunks)
 
 
 @st.cache_resource(show_spinner=False)
-def cached_retriever(_vector_store):
-    """Cache retriever object."""
-    return retriever_docs(_vector_store)
+def cached_retriever(video_id: str, thread_id=None):
+    """Cache retriever object (one per conversation, with its own retrieval cache)."""
+    return video_retriever(video_id, thread_id=thread_id)
 
 
 # keep build_chatbot cached too (resource-level since it holds model connections)
@@ -225,13 +230,14 @@ if youtube_captions:
 
     with st.spinner("⏳ Processing..."):
         status_box.info("🔄 Splitting text into chunks...")
-        chunks = cached_text_splitter(youtube_captions)
+        video_id = extract_video_id(st.session_state['youtube_url'])
+        chunks = iter_video_chunks(video_id)  # persisted per (video, chunker config); consumed while embedding
         #print(chunks[0])
         status_box.info("✅ Text split into chunks\n\n🔄 Generating embeddings...")
-        vector_store = cached_generate_embeddings(chunks)
+        cached_generate_embeddings(video_id, video_transcript_hash(video_id), chunks)
 
         status_box.info("✅ Embeddings generated\n\n🔄 Creating retriever...")
-        retriever = cached_retriever(vector_store)
+        retriever = cached_retriever(video_id, thread_id)
 
     status_box.success("🎉 Chatbot ready!")
 
@@ -315,11 +321,9 @@ user_input = st.chat_input("Enter your question:")
 if user_input:   
     if st.session_state['message_history'] == []:
         add_threadId_to_chatThreads(thread_id=thread_id)
-        with st.spinner("saving into FAISS"):
-            save_embeddings_faiss(thread_id=thread_id ,vector_store=vector_store)   
-            save_youtube_url_to_db(thread_id=thread_id , youtube_url=input_url )
-            save_captions_to_db(thread_id=thread_id , captions=youtube_captions )
-        st.sidebar.status("Done") 
+        # Index and transcript are owned by the video; the thread just points at it.
+        # Saved on the background writer so the answer starts streaming right away
+        persist_in_background(f"youtube_url:{thread_id}", save_youtube_url_to_db, thread_id=thread_id , youtube_url=input_url )
     st.session_state['message_history'].append({"role": "user", "content": user_input})
     with st.chat_message("user"):
         st.text(user_input)
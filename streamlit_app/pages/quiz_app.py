@@ -1,6 +1,7 @@
 import streamlit as st
-from testing_quiz.model_quiz import QuizGenerator, load_transcript
-from testing_quiz.utils import get_embed_url , save_quiz_to_db ,load_quiz_from_db
+from testing_quiz.model_quiz import QuizGenerator, QuizList, load_llm_transcript
+from testing_quiz.utils import get_embed_url , load_quiz_from_db
+from testing_chatbot.rag.utils_video_registry import link_thread_to_video , get_or_create_video_artifact
 st.title("📹 TubeTalk.ai → Topics Extractor")
 
 youtube_url = st.text_input("Enter YouTube URL:")
@@ -9,7 +10,7 @@ thread_id = st.text_input("Enter a unique Thread ID (for saving & retrieving):")
 # ✅ Cache transcript loading
 @st.cache_data
 def get_captions(youtube_url: str):
-    return load_transcript(youtube_url)
+    return load_llm_transcript(youtube_url)
 
 # ✅ Cache quiz generation
 @st.cache_resource
@@ -19,7 +20,7 @@ def get_quiz(captions):
 
 embed_url = get_embed_url(youtube_url)
 if thread_id and youtube_url:
-
+    video_id = link_thread_to_video(thread_id, youtube_url)
     quiz_list = load_quiz_from_db(thread_id)
     if quiz_list:
         st.success("✅ Quiz loaded from DB!")
@@ -28,8 +29,11 @@ if thread_id and youtube_url:
         captions = get_captions(youtube_url)
     
         if captions:
-            quiz_list = get_quiz(captions)
-            save_quiz_to_db(thread_id,quiz_list.model_dump_json())  # Save to DB
+            # Quiz is saved once per video and shared by every thread on it
+            quiz_json = get_or_create_video_artifact(
+                video_id, "quiz", lambda: get_quiz(captions).model_dump_json()
+            )
+            quiz_list = QuizList.model_validate_json(quiz_json)
             st.success("✅ Quiz generated! and Saved to DB!")
     if "play_index" not in st.session_state:
         st.session_state.play_index = None
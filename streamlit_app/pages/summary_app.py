@@ -1,8 +1,9 @@
 # test_app.py
 import streamlit as st
 from dotenv import load_dotenv
-from testing_summary.test_model import load_transcript, generate_summary
-from testing_summary.utlis_db import extract_topics_from_db , save_summary_to_db ,get_summary_if_exists
+from testing_summary.test_model import load_llm_transcript, generate_summary
+from testing_summary.utlis_db import extract_topics_from_db , get_summary_if_exists
+from testing_chatbot.rag.utils_video_registry import link_thread_to_video , save_video_artifact
 # Load environment variables (Google credentials etc.)
 load_dotenv()
 
@@ -29,6 +30,7 @@ if st.button("🔎 Generate Summary"):
     if not thread_id.strip():
         st.warning("⚠️ Please enter a Thread ID.")
     else:
+        video_id = link_thread_to_video(thread_id, url_input) if url_input.strip() else None
         topics_text = extract_topics_from_db(thread_id)  # make sure this returns a string
         print(topics_text)
         # 1️⃣ Check if summary already exists
@@ -42,7 +44,7 @@ if st.button("🔎 Generate Summary"):
             transcript_text = ""
             if url_input.strip():
                 with st.spinner("Fetching transcript..."):
-                    transcript_text = load_transcript(url_input)
+                    transcript_text = load_llm_transcript(url_input)
                     if transcript_text is None:
                         st.error("❌ Could not fetch transcript for this video.")
                         transcript_text = ""
@@ -59,7 +61,7 @@ if st.button("🔎 Generate Summary"):
                 # 5️⃣ Generate summary and save to DB
                 with st.spinner("Generating summary..."):
                     summary = generate_summary(transcript_text, topics_text)
-                    save_summary_to_db(thread_id, summary)  # Save summary to DB
+                    save_video_artifact(video_id, "summary", summary)  # Save summary to DB (per video)
                 
                 st.subheader("✅ Summary")
                 st.write(summary)
@@ -1,7 +1,9 @@
 import streamlit as st
 import re
-from testing_TopicsTimestamps.model import parser, extract_topics_from_transcript , parse_transcript , load_transcript
-from testing_TopicsTimestamps.utils_db import save_topics_to_db , load_topics_from_db
+from testing_TopicsTimestamps.model import parser, extract_topics_from_transcript , TopicsOutput
+from testing_chatbot.rag.utils_transcript import load_llm_transcript
+from testing_TopicsTimestamps.utils_db import load_topics_from_db
+from testing_chatbot.rag.utils_video_registry import link_thread_to_video , get_or_create_video_artifact
 def get_embed_url(url: str) -> str:
     """Convert any YouTube URL into an embeddable format."""
     match = re.search(r"v=([^&]+)", url)
@@ -17,14 +19,12 @@ def get_embed_url(url: str) -> str:
 # ✅ Cache transcript so it’s not fetched every rerun
 @st.cache_data(show_spinner=True)
 def get_transcript(url: str):
-    captions = load_transcript(url)
-    segments = parse_transcript(captions)
-    return ["[" + str(s.start_time) + "s] " + s.text for s in segments]
+    return load_llm_transcript(url)
 
 # ✅ Cache LLM output so it’s not recomputed each button click
 @st.cache_data(show_spinner=True)
 def get_summary(formatted_text: str):
-    return extract_topics_from_transcript(" ".join(formatted_text))
+    return extract_topics_from_transcript(formatted_text)
 
 st.title("📹 TubeTalk.ai → Topics Extractor")
 
@@ -32,17 +32,18 @@ youtube_url = st.text_input("Enter YouTube URL:")
 thread_id = st.text_input("Enter a unique Thread ID (for saving & retrieving):")
 
 if youtube_url and thread_id:
-    
+    video_id = link_thread_to_video(thread_id, youtube_url)
     output = load_topics_from_db(thread_id)
     if output:
         st.success("✅ Topics loaded from DB!")
         print(type(output))
     else:
         st.info("⏳ Fetching transcript...")
-        formatted = get_transcript(youtube_url)  # cached now
-        output = get_summary(formatted)  # cached now
-        print(type(output))
-        save_topics_to_db(thread_id,output.model_dump_json())  # Save to DB
+        # Topics are saved once per video and shared by every thread on it
+        topics_json = get_or_create_video_artifact(
+            video_id, "topics", lambda: get_summary(get_transcript(youtube_url)).model_dump_json()
+        )
+        output = TopicsOutput.model_validate_json(topics_json)
         st.success("✅ Topics extracted & saved to DB!")
     embed_url = get_embed_url(youtube_url)
     print(embed_url)
@@ -1,6 +1,7 @@
 import streamlit as st
 import re
-from model import parser, extract_topics_from_transcript , parse_transcript , load_transcript
+from model import parser, extract_topics_from_transcript
+from testing_chatbot.rag.utils_transcript import load_llm_transcript
 from utils_db import save_topics_to_db , load_topics_from_db
 def get_embed_url(url: str) -> str:
     """Convert any YouTube URL into an embeddable format."""
@@ -17,14 +18,12 @@ def get_embed_url(url: str) -> str:
 # ✅ Cache transcript so it’s not fetched every rerun
 @st.cache_data(show_spinner=True)
 def get_transcript(url: str):
-    captions = load_transcript(url)
-    segments = parse_transcript(captions)
-    return ["[" + str(s.start_time) + "s] " + s.text for s in segments]
+    return load_llm_transcript(url)
 
 # ✅ Cache LLM output so it’s not recomputed each button click
 @st.cache_data(show_spinner=True)
 def get_summary(formatted_text: str):
-    return extract_topics_from_transcript(" ".join(formatted_text))
+    return extract_topics_from_transcript(formatted_text)
 
 st.title("📹 TubeTalk.ai → Topics Extractor")
 
@@ -14,23 +14,10 @@ load_dotenv()
 #--------------------------
  # Utility Functions
 #--------------------------
-from youtube_transcript_api import YouTubeTranscriptApi
 import re
-def load_transcript(url: str) -> str | None:
-    """
-    Fetch transcript for a YouTube video.
-    """
-    pattern = r'(?:v=|\/)([0-9A-Za-z_-]{11})'
-    match = re.search(pattern, url)
-    if match:
-        video_id = match.group(1)
-        try:
-            captions = YouTubeTranscriptApi().fetch(video_id,languages=['en','hi']).snippets
-            data = [f"{item.text} ({item.start})" for item in captions]
-            return " ".join(data)
-        except Exception as e:
-            print(f"❌ Error fetching transcript: {e}")
-            return None
+from testing_chatbot.rag.utils_transcript import load_transcript
+from testing_chatbot.rag.utils_segments import iter_caption_segments, TranscriptSegments
+from testing_chatbot.rag.utils_normalize import prepare_transcript
 from dataclasses import dataclass
 @dataclass
 class TimestampedSegment:
@@ -41,25 +28,11 @@ class TimestampedSegment:
     
 def parse_transcript(transcript: str) -> List[TimestampedSegment]:
 
-        segments = []
-        
-        # Regular expression to find text and timestamps
-        # Pattern: captures text followed by timestamp in parentheses
-        pattern = r'(.*?)\((\d+\.?\d*)\)'
-        
-        matches = re.findall(pattern, transcript)
-        
-        for i, (text, timestamp) in enumerate(matches):
-            text = text.strip()
-            if text:  # Only add non-empty text segments
-                segment = TimestampedSegment(
-                    text=text,
-                    start_time=float(timestamp),
-                    end_time=float(matches[i+1][1]) if i+1 < len(matches) else None
-                )
-                segments.append(segment)
-        
-        return segments
+        # Single-pass, parenthesis-safe parser (see iter_caption_segments)
+        return [
+            TimestampedSegment(text=text, start_time=start, end_time=end)
+            for text, start, end in iter_caption_segments(transcript)
+        ]
 
 # -------------------------
 # 1) Pydantic output schema
@@ -132,7 +105,9 @@ model = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0)
 # -------------------------
 # 5) Runner function
 # -------------------------
-def extract_topics_from_transcript(transcript: str) -> TopicsOutput:
+def extract_topics_from_transcript(transcript: str | TranscriptSegments) -> TopicsOutput:
+    if isinstance(transcript, TranscriptSegments):
+        transcript, _ = prepare_transcript(transcript)
     prompt = chat_prompt.format_prompt(transcript=transcript, format_instructions=format_instructions)
     messages = prompt.to_messages()
 
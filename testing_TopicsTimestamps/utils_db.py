@@ -2,6 +2,7 @@ import sqlite3
 import json
 from datetime import datetime
 from testing_TopicsTimestamps.model import TopicsOutput, parser  
+from testing_chatbot.rag.utils_video_registry import load_thread_artifact
 # ================== DATABASE (SQLite) ==================
 def save_topics_to_db(thread_id: str, topics: str):
     """
@@ -31,6 +32,7 @@ from typing import Optional, Any
 def load_topics_from_db(thread_id: str) -> Optional[TopicsOutput]:
     """
     Load transcript topics from the database using thread_id.
+    Falls back to the topics of the thread's video in the video registry.
     Returns a TopicsOutput object if found, else None.
     """
     conn = sqlite3.connect(database="ragDatabase.db", check_same_thread=False)
@@ -43,6 +45,9 @@ def load_topics_from_db(thread_id: str) -> Optional[TopicsOutput]:
     
     result = cursor.fetchone()
     conn.close()
+    if not result:
+        artifact = load_thread_artifact(thread_id, "topics")
+        result = (artifact,) if artifact else None
     
     if result:
         try:
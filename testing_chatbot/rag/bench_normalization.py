@@ -0,0 +1,62 @@
+"""
+Benchmark: prompt size (and optionally Gemini latency) before vs. after transcript normalization.
+
+Run from the repo root:
+    python -m testing_chatbot.rag.bench_normalization [URL ...] [--llm] [--repeat 2]
+
+Without URLs it uses captions.txt. For every video it reports segments and
+estimated prompt tokens for the legacy "text (start)" string and for the
+normalized "[754s] text" lines. With --llm it also times a topic extraction
+call on each version (this spends Gemini quota).
+"""
+import argparse
+import time
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from testing_chatbot.rag.utils_segments import TranscriptSegments
+from testing_chatbot.rag.utils_transcript import load_segments, extract_video_id
+from testing_chatbot.rag.utils_normalize import prepare_transcript
+
+
+def time_call(fn, text: str, repeat: int) -> float:
+    """
+    Best-of-`repeat` wall time of fn(text) in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("urls", nargs="*")
+    arg_parser.add_argument("--captions", default="captions.txt")
+    arg_parser.add_argument("--llm", action="store_true", help="Also time extract_topics_from_transcript on both prompts")
+    arg_parser.add_argument("--repeat", type=int, default=1)
+    args = arg_parser.parse_args()
+
+    if args.urls:
+        videos = [(extract_video_id(url), load_segments(url)) for url in args.urls]
+    else:
+        with open(args.captions, encoding="utf-8") as f:
+            videos = [(args.captions, TranscriptSegments.from_caption_string(f.read()))]
+
+    if args.llm:
+        from testing_TopicsTimestamps.model import extract_topics_from_transcript
+
+    for video_id, segments in videos:
+        if segments is None:
+            continue
+        normalized, _ = prepare_transcript(segments, video_id=video_id)
+        if args.llm:
+            before = time_call(extract_topics_from_transcript, segments.to_caption_string(), args.repeat)
+            after = time_call(extract_topics_from_transcript, normalized, args.repeat)
+            print(f"   topics latency: {before:.1f}s → {after:.1f}s ({1 - after / before:.0%} faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: float32 vs scalar-quantized FAISS index storage.
+
+Run from the repo root (defaults to captions.txt and the chat's embedding model):
+    python -m testing_chatbot.rag.bench_quantization [--captions captions.txt] [--queries 200]
+    python -m testing_chatbot.rag.bench_quantization --hours 10 --model hashing-384   # offline
+
+For every FAISS_QUANTIZATION mode reports the saved index file and whole
+directory sizes, load time and recall@3
+against the float32 index's top 3 for the same questions.
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import time
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from testing_chatbot.rag.bench_transcript_parser import synthetic_transcript
+from testing_chatbot.rag.utils_segments import TranscriptSegments
+from testing_chatbot.rag.utils_chunking import chunk_segments
+from testing_chatbot.rag.utils_embeddings import EMBEDDING_MODEL, get_embeddings
+from testing_chatbot.rag.utils_embedding_pipeline import build_vector_store
+from testing_chatbot.rag.utils_faiss_quantize import QUANTIZERS, index_dir_size
+from testing_chatbot.rag.utils_index_cache import load_vector_store, save_vector_store
+from testing_chatbot.rag.utils_chunk_store import read_store_file
+
+K = 3
+
+
+def top_ids(vector_store, query_vectors) -> list[list[str]]:
+    import numpy as np
+
+    _, positions = vector_store.index.search(np.asarray(query_vectors, dtype=np.float32), K)
+    return [[vector_store.index_to_docstore_id[int(p)] for p in row if p != -1] for row in positions]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--captions", default="captions.txt")
+    arg_parser.add_argument("--hours", type=float, default=0.0, help="Use a synthetic transcript of this length instead")
+    arg_parser.add_argument("--model", default=EMBEDDING_MODEL)
+    arg_parser.add_argument("--queries", type=int, default=200)
+    args = arg_parser.parse_args()
+
+    if args.hours:
+        transcript = synthetic_transcript(args.hours)
+    else:
+        with open(args.captions, encoding="utf-8") as f:
+            transcript = f.read()
+    chunks = chunk_segments(TranscriptSegments.from_caption_string(transcript))
+    embeddings = get_embeddings(args.model)
+    vector_store = build_vector_store(chunks, embeddings)
+
+    rng = random.Random(0)
+    queries = []
+    for chunk in rng.choices(chunks, k=args.queries):
+        words = chunk.page_content.split()
+        queries.append(" ".join(rng.sample(words, min(6, len(words)))))
+    query_vectors = [embeddings.embed_query(query) for query in queries]
+
+    work_dir = tempfile.mkdtemp(prefix="bench_quantization_")
+    try:
+        baseline = None
+        baseline_size = None
+        print(f"{'mode':<6} {'index':>10} {'ratio':>6} {'dir':>10} {'load ms':>8} {'recall@3':>9}")
+        for mode in ["none", *QUANTIZERS]:
+            save_dir = os.path.join(work_dir, mode)
+            save_vector_store(vector_store, save_dir, quantization=mode)
+            size = os.path.getsize(os.path.join(save_dir, read_store_file(save_dir)["index_file"]))
+            started = time.perf_counter()
+            loaded = load_vector_store(save_dir, embeddings)
+            load_ms = 1000 * (time.perf_counter() - started)
+            ids = top_ids(loaded, query_vectors)
+            if baseline is None:
+                baseline, baseline_size = ids, size
+            recall = sum(len(set(a) & set(b)) for a, b in zip(ids, baseline)) / sum(len(b) for b in baseline)
+            print(f"{mode:<6} {size / 1024:>8.1f}KB {baseline_size / size:>5.1f}x {index_dir_size(save_dir) / 1024:>8.1f}KB "
+                  f"{load_ms:>8.1f} {recall:>9.3f}")
+        print(f"📦 {vector_store.index.ntotal} vectors, dim {vector_store.index.d}, model {args.model}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: chunking, indexing and search throughput of the RAG pipeline.
+
+Runs offline by default with the deterministic hashing embedder, so it needs
+no model weights or network:
+    python -m testing_chatbot.rag.bench_rag [--hours 10] [--model hashing-384] [--queries 200]
+    python -m testing_chatbot.rag.bench_rag --model sentence-transformers/all-MiniLM-L6-v2 --processes 4
+
+Reports chunks/sec for chunking and embedding+indexing, and queries/sec plus
+mean latency for retriever searches (k=3, as in retriever_docs), first with a
+cold retrieval cache and then for the same questions asked again.
+"""
+import argparse
+import random
+import time
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from testing_chatbot.rag.bench_transcript_parser import synthetic_transcript
+from testing_chatbot.rag.utils_segments import TranscriptSegments
+from testing_chatbot.rag.utils_chunking import CHUNKERS
+from testing_chatbot.rag.utils_embeddings import get_embeddings
+from testing_chatbot.rag.utils_embedding_pipeline import build_vector_store
+from testing_chatbot.rag.utils_retrieval_cache import CachedRetriever, retrieval_cache_metrics
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--captions", default=None, help="Use this caption file instead of a synthetic transcript")
+    arg_parser.add_argument("--hours", type=float, default=10.0)
+    arg_parser.add_argument("--model", default="hashing-384")
+    arg_parser.add_argument("--chunker", default="segments", choices=list(CHUNKERS))
+    arg_parser.add_argument("--batch-size", type=int, default=64)
+    arg_parser.add_argument("--processes", type=int, default=0)
+    arg_parser.add_argument("--queries", type=int, default=200)
+    arg_parser.add_argument("--cache", action="store_true", help="Keep the on-disk embedding cache enabled")
+    args = arg_parser.parse_args()
+    if not args.cache:
+        os.environ["EMBEDDING_CACHE"] = "0"
+
+    if args.captions:
+        with open(args.captions, encoding="utf-8") as f:
+            transcript = f.read()
+    else:
+        transcript = synthetic_transcript(args.hours)
+    segments = TranscriptSegments.from_caption_string(transcript)
+
+    started = time.perf_counter()
+    chunks = list(CHUNKERS[args.chunker][0](segments))
+    chunk_seconds = time.perf_counter() - started
+    print(f"✂️ {len(segments)} segments → {len(chunks)} chunks in {chunk_seconds:.2f}s ({len(chunks) / chunk_seconds:,.0f} chunks/s)")
+
+    embeddings = get_embeddings(args.model)
+    started = time.perf_counter()
+    vector_store = build_vector_store(chunks, embeddings, batch_size=args.batch_size, processes=args.processes)
+    index_seconds = time.perf_counter() - started
+    print(f"📦 Indexed {vector_store.index.ntotal} vectors (dim {vector_store.index.d}) in {index_seconds:.2f}s "
+          f"({len(chunks) / index_seconds:,.0f} chunks/s)")
+
+    rng = random.Random(0)
+    queries = [" ".join(rng.sample(chunk.page_content.split(), min(6, len(chunk.page_content.split()))))
+               for chunk in rng.choices(chunks, k=args.queries)]
+    retriever = CachedRetriever(vectorstore=vector_store, search_kwargs={"k": 3}, cache_key="bench")
+    for label in ("first ask", "repeat"):
+        started = time.perf_counter()
+        for query in queries:
+            retriever.invoke(query)
+        search_seconds = time.perf_counter() - started
+        print(f"🔎 {len(queries)} searches ({label}) in {search_seconds:.2f}s ({len(queries) / search_seconds:,.0f} queries/s, "
+              f"{1000 * search_seconds / len(queries):.2f} ms each)")
+    print(f"📊 Retrieval cache: {retrieval_cache_metrics()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: legacy regex transcript parser vs. the streaming iter_caption_segments.
+
+Run from the repo root:
+    python -m testing_chatbot.rag.bench_transcript_parser [--hours 10] [--repeat 3]
+
+Reports segments/sec and peak memory (tracemalloc) on captions.txt and on a
+synthetic transcript of the requested length.
+"""
+import argparse
+import random
+import re
+import time
+import tracemalloc
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from testing_chatbot.rag.utils_segments import iter_caption_segments
+
+
+def legacy_parse(transcript: str) -> list:
+    """
+    The original parse_transcript: lazy regex + findall, end_time via matches[i+1].
+    """
+    segments = []
+    matches = re.findall(r'(.*?)\((\d+\.?\d*)\)', transcript)
+    for i, (text, timestamp) in enumerate(matches):
+        text = text.strip()
+        if text:
+            segments.append((
+                text,
+                float(timestamp),
+                float(matches[i + 1][1]) if i + 1 < len(matches) else None
+            ))
+    return segments
+
+
+def streaming_parse(transcript: str) -> int:
+    """
+    Consume iter_caption_segments without materialising a list.
+    """
+    count = 0
+    for _ in iter_caption_segments(transcript):
+        count += 1
+    return count
+
+
+def synthetic_transcript(hours: float, seed: int = 0) -> str:
+    """
+    Build a "text (start)" transcript of roughly `hours` of speech,
+    with the odd parenthesised aside mixed in.
+    """
+    rng = random.Random(seed)
+    words = "so guys today we are going to discuss the basic differences between models agents and tools".split()
+    asides = ["(laughs)", "(see slide 3)", "f(x)", "[Music]"]
+    parts = []
+    t = 0.0
+    while t < hours * 3600:
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(4, 9)))
+        if rng.random() < 0.05:
+            text += " " + rng.choice(asides)
+        parts.append(f"{text} ({round(t, 3)})")
+        t += rng.uniform(1.5, 4.0)
+    return " ".join(parts)
+
+
+def measure(label: str, fn, transcript: str, repeat: int):
+    best = float("inf")
+    segments = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(transcript)
+        best = min(best, time.perf_counter() - start)
+        segments = result if isinstance(result, int) else len(result)
+    tracemalloc.start()
+    fn(transcript)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<10} {segments:>8} segs  {segments / best:>12,.0f} segs/sec  peak {peak / 1024 / 1024:8.2f} MB")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--captions", default="captions.txt")
+    arg_parser.add_argument("--hours", type=float, default=10.0)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    inputs = []
+    if os.path.exists(args.captions):
+        with open(args.captions, encoding="utf-8") as f:
+            inputs.append((args.captions, f.read()))
+    inputs.append((f"synthetic {args.hours:g}h", synthetic_transcript(args.hours)))
+
+    for name, transcript in inputs:
+        print(f"{name} ({len(transcript) / 1024:.0f} KB)")
+        measure("legacy", legacy_parse, transcript, args.repeat)
+        measure("streaming", streaming_parse, transcript, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: the FAISS shared index vs the sqlite-vec backend.
+
+Runs in a scratch directory (its own ragDatabase.db and faiss_indexes/), offline
+by default with the hashing embedder:
+    python -m testing_chatbot.rag.bench_vector_backends [--videos 20] [--hours 1] [--queries 200]
+
+For each backend reports indexing time, load time (a fresh index object
+answering its first query), per-video query latency (p50/p95, k=3) and how
+often sqlite-vec's top 3 matches FAISS's.
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from testing_chatbot.rag.bench_transcript_parser import synthetic_transcript
+from testing_chatbot.rag.utils_segments import TranscriptSegments
+from testing_chatbot.rag.utils_chunking import chunk_segments
+from testing_chatbot.rag.utils_embeddings import get_embeddings
+from testing_chatbot.rag.utils_shared_index import SharedVectorIndex
+
+K = 3
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_backend(name: str, make_index, videos: dict, queries: list, embeddings) -> list:
+    index = make_index()
+    started = time.perf_counter()
+    for video_id, chunks in videos.items():
+        index.add_video(video_id, chunks, embeddings)
+    build_seconds = time.perf_counter() - started
+
+    video_id, query_vector = queries[0]
+    started = time.perf_counter()
+    make_index().search(query_vector, K, [video_id])
+    load_ms = 1000 * (time.perf_counter() - started)
+
+    results, latencies = [], []
+    for video_id, query_vector in queries:
+        started = time.perf_counter()
+        results.append(index.search(query_vector, K, [video_id]))
+        latencies.append(1000 * (time.perf_counter() - started))
+    print(f"{name:<10} build {build_seconds:6.2f}s  load {load_ms:7.2f} ms  "
+          f"query p50 {percentile(latencies, 0.5):6.2f} ms  p95 {percentile(latencies, 0.95):6.2f} ms")
+    return [[doc.page_content for doc in index.documents(ids)] for ids in results]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--videos", type=int, default=20)
+    arg_parser.add_argument("--hours", type=float, default=1.0, help="Length of each synthetic lecture")
+    arg_parser.add_argument("--model", default="hashing-384")
+    arg_parser.add_argument("--queries", type=int, default=200)
+    args = arg_parser.parse_args()
+    os.environ.setdefault("EMBEDDING_CACHE", "0")
+
+    rng = random.Random(0)
+    videos = {}
+    for number in range(args.videos):
+        video_id = f"bench{number:06d}"
+        segments = TranscriptSegments.from_caption_string(synthetic_transcript(args.hours, seed=number))
+        videos[video_id] = chunk_segments(segments, video_id=video_id)
+    embeddings = get_embeddings(args.model)
+    queries = []
+    for _ in range(args.queries):
+        video_id = rng.choice(list(videos))
+        words = rng.choice(videos[video_id]).page_content.split()
+        queries.append((video_id, embeddings.embed_query(" ".join(rng.sample(words, min(6, len(words)))))))
+    print(f"📚 {args.videos} videos, {sum(map(len, videos.values()))} chunks, model {args.model}")
+
+    work_dir = tempfile.mkdtemp(prefix="bench_vector_backends_")
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        faiss_results = run_backend("faiss", lambda: SharedVectorIndex(args.model), videos, queries, embeddings)
+        try:
+            from testing_chatbot.rag.utils_sqlite_vec import SqliteVecIndex
+            vec_results = run_backend("sqlite-vec", lambda: SqliteVecIndex(args.model), videos, queries, embeddings)
+        except (ImportError, RuntimeError) as e:
+            print(f"⚠️ sqlite-vec skipped: {e}")
+            return
+        same = sum(len(set(a) & set(b)) for a, b in zip(faiss_results, vec_results))
+        print(f"🎯 sqlite-vec top-{K} agreement with FAISS: {same / sum(len(a) for a in faiss_results):.3f}")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
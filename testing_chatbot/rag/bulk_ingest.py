@@ -0,0 +1,238 @@
+"""
+Bulk ingestion: preload whole courses (a playlist or a file of URLs).
+
+Transcripts are fetched concurrently under a configurable limit, then each one
+is chunked, embedded and added to the shared vector index (see
+utils_shared_index) and marked in the video registry. Progress is
+checkpointed in the `ingest_progress` table so a crashed run resumes where it
+stopped (videos already marked ready are skipped). Runs with --fake-latency or
+--no-embed measure throughput only and leave the checkpoints alone; a
+--fake-latency run that embeds works in a scratch directory (its own
+ragDatabase.db and faiss_indexes/) so synthetic chunks never land under real
+video IDs.
+
+    python -m testing_chatbot.rag.bulk_ingest --playlist "https://www.youtube.com/playlist?list=..."
+    python -m testing_chatbot.rag.bulk_ingest --file course_urls.txt --concurrency 8
+    python -m testing_chatbot.rag.bulk_ingest --file course_urls.txt --fake-latency 0.5 --no-embed
+"""
+import argparse
+import asyncio
+import random
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+import requests
+from testing_chatbot.rag.utils_transcript import TRANSCRIPT_DB, extract_video_id, fetch_snippets
+from testing_chatbot.rag.utils_segments import TranscriptSegments
+from testing_chatbot.rag.utils_video_registry import register_video
+
+
+# ================== INPUTS ==================
+def load_playlist_video_ids(playlist_url: str) -> list[str]:
+    """
+    Scrape the video IDs of a public playlist (or channel /videos page) in order.
+    """
+    response = requests.get(playlist_url, headers={"Accept-Language": "en"}, timeout=30)
+    response.raise_for_status()
+    return list(dict.fromkeys(re.findall(r'"videoId":"([0-9A-Za-z_-]{11})"', response.text)))
+
+
+def load_url_file(path: str) -> list[str]:
+    """
+    Read one YouTube URL (or video ID) per line; blank lines and # comments are ignored.
+    """
+    video_ids = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                video_id = extract_video_id(line)
+                if video_id:
+                    video_ids.append(video_id)
+                else:
+                    print(f"⚠️ Skipping unrecognised URL: {line}")
+    return list(dict.fromkeys(video_ids))
+
+
+class FakeTranscriptFetcher:
+    """
+    Local stand-in for YouTube: returns synthetic snippets after `latency` seconds.
+    """
+    def __init__(self, latency: float = 0.2, segments: int = 600, seed: int = 0):
+        self.latency = latency
+        self.segments = segments
+        self.seed = seed
+
+    def __call__(self, video_id: str) -> list:
+        time.sleep(self.latency)
+        rng = random.Random(f"{self.seed}-{video_id}")
+        words = "today we discuss models agents tools memory planning retrieval evaluation".split()
+        start = 0.0
+        snippets = []
+        for _ in range(self.segments):
+            duration = rng.uniform(1.5, 4.0)
+            snippets.append([" ".join(rng.choice(words) for _ in range(8)), round(start, 3), round(duration, 3)])
+            start += duration
+        return snippets
+
+
+# ================== CHECKPOINTS (SQLite) ==================
+def _connect():
+    conn = sqlite3.connect(database=TRANSCRIPT_DB, timeout=30, check_same_thread=False)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS ingest_progress (
+        video_id TEXT PRIMARY KEY,
+        status TEXT,
+        chunks INTEGER,
+        error TEXT,
+        updated_at TIMESTAMP
+    )
+    """)
+    return conn
+
+
+def load_ready_video_ids() -> set[str]:
+    """
+    Video IDs already ingested by an earlier (possibly crashed) run.
+    """
+    conn = _connect()
+    rows = conn.execute("SELECT video_id FROM ingest_progress WHERE status = 'ready'").fetchall()
+    conn.close()
+    return {row[0] for row in rows}
+
+
+def mark_video(video_id: str, status: str, chunks: int = 0, error: str | None = None):
+    """
+    Record the ingestion status of a video (pending / ready / failed).
+    """
+    conn = _connect()
+    conn.execute(
+        "INSERT OR REPLACE INTO ingest_progress (video_id, status, chunks, error, updated_at) VALUES (?, ?, ?, ?, ?)",
+        (video_id, status, chunks, error, datetime.now())
+    )
+    conn.commit()
+    conn.close()
+
+
+# ================== PIPELINE ==================
+def index_video(video_id: str, segments: TranscriptSegments) -> int:
+    """
+    Chunk and embed one video into the shared index (skipped if the same
+    chunks are already there; unchanged chunks come from the embedding cache).
+    Returns the chunk count.
+    """
+    # Imported here so fake/no-embed runs don't load the embedding stack
+    from testing_chatbot.rag.utils_shared_index import get_video_index
+    from testing_chatbot.rag.utils_chunking import get_video_chunks
+
+    chunks = get_video_chunks(video_id, segments)
+    get_video_index().add_video(video_id, chunks)
+    register_video(video_id)
+    return len(chunks)
+
+
+def count_only(video_id: str, segments: TranscriptSegments) -> int:
+    """
+    No-op indexer for measuring fetch throughput on its own.
+    """
+    return len(segments)
+
+
+async def ingest_videos(video_ids, fetch=fetch_snippets, index=index_video, concurrency: int = 4,
+                        record_progress: bool = True) -> dict:
+    """
+    Fetch transcripts with at most `concurrency` requests in flight and index
+    them one at a time (embedding is CPU-bound and shares one model).
+    With record_progress=False nothing is skipped or checkpointed.
+    Returns counts plus throughput in videos/minute.
+    """
+    ready = load_ready_video_ids() if record_progress else set()
+    todo = [video_id for video_id in video_ids if video_id not in ready]
+    fetch_slots = asyncio.Semaphore(concurrency)
+    index_lock = asyncio.Lock()
+    stats = {"skipped": len(video_ids) - len(todo), "ready": 0, "failed": 0}
+
+    async def checkpoint(video_id: str, status: str, **kwargs):
+        if record_progress:
+            await asyncio.to_thread(mark_video, video_id, status, **kwargs)
+
+    async def run(video_id: str):
+        try:
+            async with fetch_slots:
+                await checkpoint(video_id, "pending")
+                snippets = await asyncio.to_thread(fetch, video_id)
+            segments = TranscriptSegments.from_snippets(snippets)
+            async with index_lock:
+                chunks = await asyncio.to_thread(index, video_id, segments)
+            await checkpoint(video_id, "ready", chunks=chunks)
+            stats["ready"] += 1
+            print(f"✅ {video_id}: {len(segments)} segments, {chunks} chunks")
+        except Exception as e:
+            await checkpoint(video_id, "failed", error=str(e))
+            stats["failed"] += 1
+            print(f"❌ {video_id}: {e}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(video_id) for video_id in todo))
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = elapsed
+    stats["videos_per_minute"] = stats["ready"] / (elapsed / 60) if elapsed else 0.0
+    return stats
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = arg_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--playlist", help="Playlist or channel /videos URL")
+    source.add_argument("--file", help="Text file with one YouTube URL per line")
+    arg_parser.add_argument("--concurrency", type=int, default=4)
+    arg_parser.add_argument("--fake-latency", type=float, default=None,
+                            help="Use a local fake transcript fetcher with this per-video latency (seconds)")
+    arg_parser.add_argument("--no-embed", action="store_true", help="Fetch and parse only, skip chunking/embedding")
+    args = arg_parser.parse_args()
+
+    video_ids = load_playlist_video_ids(args.playlist) if args.playlist else load_url_file(args.file)
+    fetch = FakeTranscriptFetcher(latency=args.fake_latency) if args.fake_latency is not None else fetch_snippets
+    index = count_only if args.no_embed else index_video
+
+    print(f"📥 Ingesting {len(video_ids)} videos (concurrency={args.concurrency})")
+    record_progress = args.fake_latency is None and not args.no_embed
+    # Fake transcripts must not be indexed under real video IDs in the real
+    # database, so an embedding fake run gets a throwaway working directory
+    work_dir = None
+    cwd = os.getcwd()
+    if args.fake_latency is not None and not args.no_embed:
+        work_dir = tempfile.mkdtemp(prefix="bulk_ingest_fake_")
+        os.chdir(work_dir)
+        print(f"🧪 Fake transcripts: indexing into scratch directory {work_dir}")
+    try:
+        stats = asyncio.run(ingest_videos(video_ids, fetch=fetch, index=index, concurrency=args.concurrency,
+                                          record_progress=record_progress))
+        print(
+            f"🎉 ready={stats['ready']} failed={stats['failed']} skipped={stats['skipped']} "
+            f"in {stats['seconds']:.1f}s → {stats['videos_per_minute']:.1f} videos/min"
+        )
+        if not args.no_embed:
+            from testing_chatbot.rag.utils_embeddings import embedding_metrics
+            for metrics in embedding_metrics():
+                print(
+                    f"🧠 {metrics['model_name']}: loaded in {metrics['load_seconds']:.1f}s, "
+                    f"{metrics['documents']} chunks in {metrics['document_batches']} batches "
+                    f"({metrics['documents_per_second']:.0f} chunks/s), "
+                    f"cache hits {metrics['cache_hits']}/{metrics['cache_hits'] + metrics['cache_misses']}"
+                )
+            from testing_chatbot.rag.utils_shared_index import get_video_index
+            print(f"🗂️ Video index: {get_video_index().stats()}")
+    finally:
+        if work_dir:
+            os.chdir(cwd)
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Incremental (append-mode) ingestion for livestreams and other growing transcripts.
+
+Each poll re-fetches the snippets, keeps only those past the last indexed
+timestamp, chunks and embeds just that delta into the thread's existing FAISS
+index, and extends the stored topic timeline with topics from the new part.
+Writing the index, captions and transcript cache rewrites the whole lecture,
+so new chunks are only added in memory and saved every `--save-every` polls
+that produced any (and on the final flush). Watermarks live in the
+`live_ingest_state` table and only cover what has been saved, so a restarted
+poller continues where the last save stopped.
+
+    python -m testing_chatbot.rag.live_ingest --url "https://www.youtube.com/watch?v=..." --thread-id my_stream --interval 60
+"""
+import argparse
+import json
+import sqlite3
+import time
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from testing_chatbot.rag.utils_transcript import TRANSCRIPT_DB, DEFAULT_LANGUAGES, extract_video_id, save_snippets_to_cache
+from testing_chatbot.rag.utils_transcript_providers import get_provider
+from testing_chatbot.rag.utils_segments import TranscriptSegments
+from testing_chatbot.rag.utils_rag import (
+    text_splitter, generate_embeddings, save_embeddings_faiss, load_embeddings_faiss, vector_store_from_video_index
+)
+from testing_chatbot.rag.utils_database import save_captions_to_db
+from testing_chatbot.rag.utils_index_cache import stored_documents
+
+
+# ================== WATERMARKS (SQLite) ==================
+def _connect():
+    conn = sqlite3.connect(database=TRANSCRIPT_DB, timeout=30, check_same_thread=False)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS live_ingest_state (
+        thread_id TEXT PRIMARY KEY,
+        video_id TEXT,
+        indexed_until REAL,
+        topics_until REAL,
+        updated_at TIMESTAMP
+    )
+    """)
+    return conn
+
+
+def load_live_state(thread_id: str) -> tuple[float, float]:
+    """
+    Return (indexed_until, topics_until) for a thread; -1 means nothing done yet.
+    """
+    conn = _connect()
+    row = conn.execute(
+        "SELECT indexed_until, topics_until FROM live_ingest_state WHERE thread_id = ?", (thread_id,)
+    ).fetchone()
+    conn.close()
+    return (row[0], row[1]) if row else (-1.0, -1.0)
+
+
+def save_live_state(thread_id: str, video_id: str, indexed_until: float, topics_until: float):
+    conn = _connect()
+    conn.execute(
+        "INSERT OR REPLACE INTO live_ingest_state (thread_id, video_id, indexed_until, topics_until, updated_at) VALUES (?, ?, ?, ?, ?)",
+        (thread_id, video_id, indexed_until, topics_until, datetime.now())
+    )
+    conn.commit()
+    conn.close()
+
+
+# ================== LIVE SESSION ==================
+class LiveTranscriptSession:
+    """
+    Keeps one thread's index and topic timeline in step with a growing transcript.
+
+    New snippets are buffered until at least `min_chunk_seconds` of speech has
+    arrived (so polls don't produce slivers of chunks), and topics are only
+    extracted once `min_topic_seconds` of unprocessed speech is available.
+    The index and captions are saved every `save_every` polls with new chunks.
+    """
+    def __init__(self, url: str, thread_id: str, min_chunk_seconds: float = 60.0, min_topic_seconds: float = 300.0,
+                 save_every: int = 5):
+        self.url = url
+        self.video_id = extract_video_id(url)
+        if not self.video_id:
+            raise ValueError(f"Not a YouTube URL: {url}")
+        self.thread_id = thread_id
+        self.min_chunk_seconds = min_chunk_seconds
+        self.min_topic_seconds = min_topic_seconds
+        self.save_every = save_every
+        self.indexed_until, self.topics_until = load_live_state(thread_id)
+        self.saved_until = self.indexed_until
+        self._unsaved_polls = 0
+        self._latest = None  # (language_code, snippets) of the last fetch
+        try:
+            self.vector_store = getattr(load_embeddings_faiss(thread_id, writable=True), "vectorstore", None)
+        except FileNotFoundError:
+            self.vector_store = None
+        self._seeded_until_segment = None
+        if self.vector_store is None:
+            # The thread only points at its video in the shared index: its own index (which
+            # load_embeddings_faiss prefers from now on) starts from the video's chunks
+            self.vector_store = vector_store_from_video_index(self.video_id)
+            if self.vector_store is not None and self.indexed_until < 0:
+                self._seeded_until_segment = max(doc.metadata.get("last_segment", -1)
+                                                 for doc in stored_documents(self.vector_store))
+
+    def _fetch(self) -> list:
+        # Always go to the provider: the transcript caches would hand back the stale copy
+        language_code, snippets = get_provider().fetch(self.video_id, DEFAULT_LANGUAGES)
+        self._latest = (language_code, snippets)
+        return snippets
+
+    def _save(self, segments: TranscriptSegments):
+        """
+        Write the index, the thread's captions and the transcript cache as of this poll.
+        """
+        save_embeddings_faiss(thread_id=self.thread_id, vector_store=self.vector_store)
+        save_captions_to_db(thread_id=self.thread_id, captions=segments.to_caption_string())
+        if get_provider().cacheable:
+            save_snippets_to_cache(self.video_id, DEFAULT_LANGUAGES, *self._latest)
+        self.saved_until = self.indexed_until
+        self._unsaved_polls = 0
+
+    def poll(self, flush: bool = False) -> dict:
+        """
+        Fetch, then index and extract topics for whatever is new. Returns counts.
+        """
+        snippets = self._fetch()
+        segments = TranscriptSegments.from_snippets(snippets)
+        stats = {"segments": len(segments), "new_chunks": 0, "new_topics": 0}
+        if self._seeded_until_segment is not None:
+            # Segments already in the seeded index aren't new
+            if 0 <= self._seeded_until_segment < len(segments):
+                self.indexed_until = segments.start(self._seeded_until_segment)
+            self._seeded_until_segment = None
+
+        new_items = [item for item in segments if item[1] > self.indexed_until]
+        if new_items and (flush or new_items[-1][1] - new_items[0][1] >= self.min_chunk_seconds):
+            delta = TranscriptSegments.from_snippets(new_items)
+            chunks = text_splitter(delta, video_id=self.video_id)
+            base = len(segments) - len(new_items)
+            for chunk in chunks:
+                chunk.metadata["first_segment"] += base
+                chunk.metadata["last_segment"] += base
+            if self.vector_store is None:
+                self.vector_store = generate_embeddings(chunks)
+            else:
+                self.vector_store.add_documents(chunks)
+            self.indexed_until = new_items[-1][1]
+            self._unsaved_polls += 1
+            stats["new_chunks"] = len(chunks)
+        if self.indexed_until > self.saved_until and (flush or self._unsaved_polls >= self.save_every):
+            self._save(segments)
+            stats["saved"] = True
+
+        pending = [item for item in segments if self.topics_until < item[1] <= self.indexed_until]
+        if pending and (flush or pending[-1][1] - pending[0][1] >= self.min_topic_seconds):
+            stats["new_topics"] = self._extend_topics(TranscriptSegments.from_snippets(pending))
+            self.topics_until = pending[-1][1]
+
+        save_live_state(self.thread_id, self.video_id, self.saved_until, self.topics_until)
+        return stats
+
+    def _extend_topics(self, delta: TranscriptSegments) -> int:
+        """
+        Extract topics for the new part only and append them to the saved timeline.
+        """
+        from testing_TopicsTimestamps.model import extract_topics_from_transcript
+        from testing_TopicsTimestamps.utils_db import save_topics_to_db, load_topics_from_db
+
+        new_topics = extract_topics_from_transcript(delta)
+        existing = load_topics_from_db(self.thread_id)
+        if existing is not None:
+            last = existing.main_topics[-1].timestamp if existing.main_topics else -1.0
+            existing.main_topics.extend(t for t in new_topics.main_topics if t.timestamp > last)
+            new_topics = existing
+        save_topics_to_db(self.thread_id, new_topics.model_dump_json())
+        return len(new_topics.main_topics)
+
+    def run(self, interval: float = 60.0, max_polls: int | None = None):
+        """
+        Poll every `interval` seconds until interrupted (or max_polls is reached).
+        """
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                started = time.perf_counter()
+                stats = self.poll()
+                polls += 1
+                print(f"🔄 {self.thread_id}: {json.dumps(stats)} in {time.perf_counter() - started:.1f}s")
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        print(f"✅ Final flush: {json.dumps(self.poll(flush=True))}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--url", required=True)
+    arg_parser.add_argument("--thread-id", required=True)
+    arg_parser.add_argument("--interval", type=float, default=60.0)
+    arg_parser.add_argument("--max-polls", type=int, default=None)
+    arg_parser.add_argument("--save-every", type=int, default=5, help="Save the index every N polls with new chunks")
+    args = arg_parser.parse_args()
+    session = LiveTranscriptSession(args.url, args.thread_id, save_every=args.save_every)
+    session.run(interval=args.interval, max_polls=args.max_polls)
+
+
+if __name__ == "__main__":
+    main()
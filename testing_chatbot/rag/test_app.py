@@ -5,6 +5,7 @@ from testing_chatbot.rag.utils_youtube import get_embed_url , load_transcript
 from testing_chatbot.rag.utils_database import  save_youtube_url_to_db , delete_all_threads_from_db , save_captions_to_db
 from testing_chatbot.rag.utils_st_sessions import reset_chat , sidebar_thread_selection , add_threadId_to_chatThreads
 from testing_chatbot.rag.utils_rag import text_splitter , generate_embeddings , retriever_docs , save_embeddings_faiss ,clear_faiss_indexes
+from testing_chatbot.rag.utils_background_writer import persist_in_background
 st.set_page_config(
     page_title="LectureChat",
     page_icon="💬",
@@ -315,11 +316,10 @@ user_input = st.chat_input("Enter your question:")
 if user_input:   
     if st.session_state['message_history'] == []:
         add_threadId_to_chatThreads(thread_id=thread_id)
-        with st.spinner("saving into FAISS"):
-            save_embeddings_faiss(thread_id=thread_id ,vector_store=vector_store)   
-            save_youtube_url_to_db(thread_id=thread_id , youtube_url=input_url )
-            save_captions_to_db(thread_id=thread_id , captions=youtube_captions )
-        st.sidebar.status("Done") 
+        # Written on the background writer (atomically) so the answer streams right away
+        persist_in_background(f"faiss:{thread_id}", save_embeddings_faiss, thread_id=thread_id ,vector_store=vector_store)
+        persist_in_background(f"youtube_url:{thread_id}", save_youtube_url_to_db, thread_id=thread_id , youtube_url=input_url )
+        persist_in_background(f"captions:{thread_id}", save_captions_to_db, thread_id=thread_id , captions=youtube_captions )
     st.session_state['message_history'].append({"role": "user", "content": user_input})
     with st.chat_message("user"):
         st.text(user_input)
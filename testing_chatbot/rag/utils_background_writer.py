@@ -0,0 +1,103 @@
+import atexit
+import os
+import queue
+import threading
+import time
+
+
+# ================== BACKGROUND PERSISTENCE ==================
+# The first question of a new chat used to wait behind a spinner while the
+# index and the thread's URL/captions were written, before the LLM was even
+# called. Those writes now go to a single daemon writer thread and the answer
+# streams right away. Jobs are keyed (an index path, "youtube_url:<thread>"...):
+# submitting a key that is still queued replaces its job, so a burst of
+# updates to one index is written once, with the latest state. One thread
+# means writes to the same key land in submission order.
+#
+# Each writer is crash-safe on its own (temp file + os.replace, SQLite
+# transactions), so a process killed mid-write leaves the previous version
+# readable; at interpreter exit pending jobs are flushed. BACKGROUND_WRITES=0
+# runs every job inline (scripts, debugging).
+BACKGROUND_WRITES = os.getenv("BACKGROUND_WRITES", "1") != "0"
+
+
+class BackgroundWriter:
+    """
+    Single-threaded, key-coalescing job queue (see persist_in_background).
+    """
+    def __init__(self):
+        self._jobs = {}  # key -> (fn, args, kwargs, submitted_at), latest wins
+        self._keys = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {"submitted": 0, "coalesced": 0, "written": 0, "failed": 0,
+                       "write_seconds": 0.0, "max_lag_ms": 0.0, "last_error": None}
+
+    def submit(self, key: str, fn, *args, **kwargs):
+        with self._lock:
+            self._stats["submitted"] += 1
+            queued = key in self._jobs
+            self._jobs[key] = (fn, args, kwargs, time.perf_counter())
+            if queued:
+                self._stats["coalesced"] += 1
+                return
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="background-writer", daemon=True)
+                self._thread.start()
+        self._keys.put(key)
+
+    def _run(self):
+        while True:
+            key = self._keys.get()
+            with self._lock:
+                fn, args, kwargs, submitted_at = self._jobs.pop(key)
+            started = time.perf_counter()
+            try:
+                fn(*args, **kwargs)
+                failed = None
+            except Exception as e:
+                failed = f"{key}: {e}"
+                print(f"❌ Background write {key} failed: {e}")
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._stats["failed" if failed else "written"] += 1
+                    self._stats["write_seconds"] += finished - started
+                    self._stats["max_lag_ms"] = max(self._stats["max_lag_ms"], 1000 * (finished - submitted_at))
+                    if failed:
+                        self._stats["last_error"] = failed
+                self._keys.task_done()
+
+    def flush(self):
+        """
+        Block until every job submitted so far has been written.
+        """
+        self._keys.join()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._jobs)
+        return stats
+
+
+_writer = BackgroundWriter()
+atexit.register(_writer.flush)
+
+
+def persist_in_background(key: str, fn, *args, **kwargs):
+    """
+    Run fn(*args, **kwargs) on the writer thread; replaces a queued job with the same key.
+    """
+    if not BACKGROUND_WRITES:
+        fn(*args, **kwargs)
+        return
+    _writer.submit(key, fn, *args, **kwargs)
+
+
+def flush_background_writes():
+    _writer.flush()
+
+
+def background_write_metrics() -> dict:
+    return _writer.metrics()
@@ -0,0 +1,155 @@
+"""
+Caption file import: SRT, WebVTT, JSON and JSON Lines -> TranscriptSegments.
+
+SRT/VTT/JSONL are parsed line by line, so files of any size stream through
+without being read into memory first (.json has to be loaded whole). An
+imported file is saved into the transcript cache under a video ID, so
+load_segments / load_transcript and the chunk -> embed -> index, topics, quiz
+and summary pipeline all work on it unchanged. Pass the real YouTube ID to
+replace a video's auto-captions with a better subtitle file; otherwise a
+stable 11-char ID is derived from the file contents.
+
+    python -m testing_chatbot.rag.utils_caption_files lecture01.srt lecture02.vtt [--video-id ID] [--index]
+"""
+import argparse
+import base64
+import json
+import re
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+import xxhash
+from testing_chatbot.rag.utils_transcript import DEFAULT_LANGUAGES, save_snippets_to_cache, fetch_segments
+from testing_chatbot.rag.utils_segments import TranscriptSegments
+
+TIMING_PATTERN = re.compile(r'((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})\s*-->\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})')
+TAG_PATTERN = re.compile(r'<[^>]*>')
+
+
+def parse_timestamp(value: str) -> float:
+    """
+    "01:02:03,450" / "02:03.450" -> seconds.
+    """
+    seconds = 0.0
+    for part in value.replace(",", ".").split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def _iter_cue_blocks(lines):
+    """
+    Group lines into blank-line separated blocks.
+    """
+    block = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.strip():
+            block.append(line)
+        elif block:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def iter_srt(lines):
+    """
+    Stream (text, start, duration) from SRT or WebVTT lines. Blocks without a
+    timing line (the WEBVTT header, NOTE and STYLE blocks) are skipped and
+    inline tags such as <c> or <00:00:01.500> are stripped.
+    """
+    for block in _iter_cue_blocks(lines):
+        for i, line in enumerate(block):
+            match = TIMING_PATTERN.search(line)
+            if match:
+                start, end = parse_timestamp(match.group(1)), parse_timestamp(match.group(2))
+                text = " ".join(TAG_PATTERN.sub("", part).strip() for part in block[i + 1:])
+                if text.strip():
+                    yield text.strip(), start, max(end - start, 0.0)
+                break
+
+
+def iter_jsonl(lines):
+    """
+    Stream (text, start, duration) from JSON Lines of {"text", "start", "duration"} objects.
+    """
+    for line in lines:
+        if line.strip():
+            item = json.loads(line)
+            yield item["text"], float(item["start"]), float(item.get("duration", 0.0))
+
+
+def iter_json(f):
+    """
+    (text, start, duration) from a JSON file: either a list of
+    {"text", "start", "duration"} snippets or YouTube's json3 "events" format.
+    """
+    data = json.load(f)
+    if isinstance(data, dict) and "events" in data:
+        for event in data["events"]:
+            text = "".join(seg.get("utf8", "") for seg in event.get("segs", [])).strip()
+            if text:
+                yield text, event["tStartMs"] / 1000, event.get("dDurationMs", 0) / 1000
+    else:
+        for item in data:
+            yield item["text"], float(item["start"]), float(item.get("duration", 0.0))
+
+
+def iter_caption_file(path: str):
+    """
+    Stream (text, start, duration) out of a caption file, picking the parser by extension.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding="utf-8-sig") as f:
+        if extension in (".srt", ".vtt"):
+            yield from iter_srt(f)
+        elif extension == ".jsonl":
+            yield from iter_jsonl(f)
+        elif extension == ".json":
+            yield from iter_json(f)
+        else:
+            raise ValueError(f"Unsupported caption file type: {extension} (expected .srt, .vtt, .json or .jsonl)")
+
+
+def caption_file_id(path: str) -> str:
+    """
+    Stable 11-char ID (same alphabet as YouTube IDs) derived from the file contents.
+    """
+    digest = xxhash.xxh64()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return base64.urlsafe_b64encode(digest.digest()).decode("ascii").rstrip("=")
+
+
+def import_caption_file(path: str, video_id: str | None = None, language_code: str = "en") -> tuple[str, TranscriptSegments]:
+    """
+    Parse a caption file into TranscriptSegments and save it in the transcript cache.
+    Returns (video_id, segments).
+    """
+    video_id = video_id or caption_file_id(path)
+    segments = TranscriptSegments.from_snippets(iter_caption_file(path))
+    save_snippets_to_cache(video_id, DEFAULT_LANGUAGES, language_code, [list(item) for item in segments])
+    fetch_segments.cache_clear()
+    return video_id, segments
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("paths", nargs="+")
+    arg_parser.add_argument("--video-id", help="YouTube ID the file belongs to (single file only)")
+    arg_parser.add_argument("--index", action="store_true", help="Also chunk, embed and index each imported file")
+    args = arg_parser.parse_args()
+    if args.video_id and len(args.paths) > 1:
+        arg_parser.error("--video-id can only be used with a single file")
+
+    for path in args.paths:
+        video_id, segments = import_caption_file(path, video_id=args.video_id)
+        print(f"✅ {path} -> {video_id}: {len(segments)} segments, {segments.duration / 60:.1f} min")
+        if args.index:
+            from testing_chatbot.rag.bulk_ingest import index_video, mark_video
+            mark_video(video_id, "ready", chunks=index_video(video_id, segments))
+
+
+if __name__ == "__main__":
+    main()
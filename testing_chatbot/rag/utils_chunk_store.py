@@ -0,0 +1,174 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from collections.abc import Mapping
+from datetime import datetime
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+from testing_chatbot.rag.utils_transcript import TRANSCRIPT_DB
+
+
+# ================== CHUNK STORE (SQLite) ==================
+# Chunk text and metadata of a saved FAISS index, addressed by vector ID (the
+# row's position in the index), instead of a pickled LangChain docstore.
+# A saved index directory holds index.faiss plus a small chunks.json naming
+# its store generation; loading reads neither text nor metadata, and a search
+# fetches only its top-k rows, so load time no longer grows with the lecture
+# and nothing is unpickled. Each save writes a new generation and the previous
+# one is kept, so a process still searching the old (memory-mapped) index
+# keeps getting matching text; a store held across more saves than that
+# (see CachedRetriever.load_dir) is reloaded rather than answering with no text. Directories saved with index.pkl are migrated
+# the first time they are loaded.
+#
+# chunks.json also names the index file of its generation and is replaced
+# atomically, so it is the commit point of a save: until it is renamed into
+# place readers see the previous generation, and a crash mid-save leaves
+# nothing they could trip over.
+STORE_FILE = "chunks.json"
+DEFAULT_INDEX_FILE = "index.faiss"
+KEEP_GENERATIONS = 2
+
+
+def _connect():
+    conn = sqlite3.connect(database=TRANSCRIPT_DB, timeout=30, check_same_thread=False)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS chunk_stores (
+        store_id TEXT PRIMARY KEY,
+        index_dir TEXT,
+        chunk_count INTEGER,
+        created_at TIMESTAMP
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS store_chunks (
+        store_id TEXT,
+        vector_id INTEGER,
+        text TEXT,
+        metadata TEXT,
+        PRIMARY KEY (store_id, vector_id)
+    ) WITHOUT ROWID
+    """)
+    return conn
+
+
+def save_chunk_store(index_dir: str, documents: list[Document]) -> str:
+    """
+    Store documents (in index order) as a new generation for `index_dir`,
+    drop generations older than the previous one, and return the store ID.
+    """
+    store_id = uuid.uuid4().hex
+    conn = _connect()
+    with conn:
+        conn.executemany(
+            "INSERT INTO store_chunks (store_id, vector_id, text, metadata) VALUES (?, ?, ?, ?)",
+            [(store_id, vector_id, doc.page_content, json.dumps(doc.metadata)) for vector_id, doc in enumerate(documents)]
+        )
+        conn.execute(
+            "INSERT INTO chunk_stores (store_id, index_dir, chunk_count, created_at) VALUES (?, ?, ?, ?)",
+            (store_id, os.path.normpath(index_dir), len(documents), datetime.now())
+        )
+        stale = [row[0] for row in conn.execute(
+            "SELECT store_id FROM chunk_stores WHERE index_dir = ? ORDER BY created_at DESC LIMIT -1 OFFSET ?",
+            (os.path.normpath(index_dir), KEEP_GENERATIONS)
+        )]
+        conn.executemany("DELETE FROM store_chunks WHERE store_id = ?", [(s,) for s in stale])
+        conn.executemany("DELETE FROM chunk_stores WHERE store_id = ?", [(s,) for s in stale])
+    conn.close()
+    return store_id
+
+
+def write_store_file(directory: str, store_id: str, count: int, index_file: str = DEFAULT_INDEX_FILE,
+                     model_name: str | None = None):
+    path = os.path.join(directory, STORE_FILE)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"store_id": store_id, "count": count, "index_file": index_file, "model": model_name}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_store_file(directory: str) -> dict | None:
+    path = os.path.join(directory, STORE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        store = json.load(f)
+    store.setdefault("index_file", DEFAULT_INDEX_FILE)  # saved before generations had their own file
+    return store
+
+
+def _to_document(text: str, metadata: str) -> Document:
+    return Document(page_content=text, metadata=json.loads(metadata))
+
+
+def load_all_documents(store_id: str) -> list[Document]:
+    conn = _connect()
+    rows = conn.execute(
+        "SELECT text, metadata FROM store_chunks WHERE store_id = ? ORDER BY vector_id", (store_id,)
+    ).fetchall()
+    conn.close()
+    return [_to_document(text, metadata) for text, metadata in rows]
+
+
+class ChunkStoreDocstore(Docstore):
+    """
+    Read-only docstore over one chunk store generation; docstore IDs are
+    vector IDs as strings (see PositionIds).
+    """
+    def __init__(self, store_id: str):
+        self.store_id = store_id
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def mget(self, doc_ids: list[str]) -> list[Document]:
+        """
+        Documents for several IDs in one query, in the given order. Raises
+        LookupError if any is missing: the generation has been dropped by later
+        saves, and whoever holds this docstore must reload the index.
+        """
+        if not doc_ids:
+            return []
+        with self._lock:
+            if self._conn is None:
+                self._conn = _connect()
+            rows = self._conn.execute(
+                f"SELECT vector_id, text, metadata FROM store_chunks WHERE store_id = ? AND vector_id IN ({','.join('?' * len(doc_ids))})",
+                (self.store_id, *map(int, doc_ids))
+            ).fetchall()
+        by_id = {str(vector_id): _to_document(text, metadata) for vector_id, text, metadata in rows}
+        missing = [doc_id for doc_id in doc_ids if doc_id not in by_id]
+        if missing:
+            raise LookupError(f"Chunk store {self.store_id} has no rows for {missing[:5]}; reload the index")
+        return [by_id[doc_id] for doc_id in doc_ids]
+
+    def search(self, search: str) -> str | Document:
+        try:
+            return self.mget([search])[0]
+        except LookupError:
+            return f"ID {search} not found."
+
+    def add(self, texts: dict):
+        raise NotImplementedError("Chunk store indexes are read-only; load them with writable=True to add")
+
+
+class PositionIds(Mapping):
+    """
+    index_to_docstore_id for a chunk store index: position i -> "i", without
+    building a dict of every position.
+    """
+    def __init__(self, count: int):
+        self.count = count
+
+    def __getitem__(self, position: int) -> str:
+        if not 0 <= position < self.count:
+            raise KeyError(position)
+        return str(position)
+
+    def __iter__(self):
+        return iter(range(self.count))
+
+    def __len__(self) -> int:
+        return self.count
@@ -0,0 +1,326 @@
+import json
+import os
+import sqlite3
+from array import array
+from datetime import datetime
+import numpy as np
+import xxhash
+from langchain_core.documents import Document
+from testing_chatbot.rag.utils_segments import TranscriptSegments
+from testing_chatbot.rag.utils_transcript import TRANSCRIPT_DB, fetch_segments
+
+
+# ================== TIMESTAMP-AWARE CHUNKING ==================
+# Chunks are cut on segment boundaries and packed up to a token budget. The
+# transcript text goes into page_content without any "(12.34)" markers; the
+# timing lives in metadata (start, end, first_segment, last_segment), so the
+# embedding model only sees speech and chat_node reads exact times from there.
+# The default budget stays under all-MiniLM-L6-v2's 256 word-piece limit.
+DEFAULT_MAX_TOKENS = 160
+DEFAULT_OVERLAP_SEGMENTS = 1
+
+
+def chunk_text_hash(text: str) -> str:
+    """
+    xxh64 of the chunk text, case- and whitespace-insensitive. Stored as
+    metadata["chunk_hash"] so an index rebuild only re-embeds chunks whose hash is new.
+    """
+    return xxhash.xxh64_hexdigest(" ".join(text.lower().split()).encode("utf-8"))
+
+
+def segment_token_offsets(segments: TranscriptSegments) -> np.ndarray:
+    """
+    Cumulative token count after each segment (~4 chars per token, +1 for the joining space).
+    """
+    offsets = np.frombuffer(segments.offsets, dtype=np.int64)
+    return np.cumsum(np.diff(offsets) // 4 + 1)
+
+
+def chunk_ranges(segments: TranscriptSegments, max_tokens: int = DEFAULT_MAX_TOKENS,
+                 overlap_segments: int = DEFAULT_OVERLAP_SEGMENTS) -> list[tuple[int, int]]:
+    """
+    Half-open segment ranges [first, last + 1) for each chunk.
+
+    Each chunk end is one searchsorted over the cumulative token offsets, so the
+    Python loop runs once per chunk, not once per segment. A segment longer than
+    the budget becomes a chunk on its own; consecutive chunks share the last
+    `overlap_segments` segments for context.
+    """
+    cumulative = segment_token_offsets(segments)
+    n = len(cumulative)
+    ranges = []
+    first = 0
+    while first < n:
+        before = cumulative[first - 1] if first else 0
+        last = max(int(np.searchsorted(cumulative, before + max_tokens, side="right")), first + 1)
+        ranges.append((first, last))
+        if last >= n:
+            break
+        first = max(last - overlap_segments, first + 1)
+    return ranges
+
+
+def iter_segment_chunks(segments: TranscriptSegments, video_id: str | None = None,
+                        max_tokens: int = DEFAULT_MAX_TOKENS, overlap_segments: int = DEFAULT_OVERLAP_SEGMENTS):
+    """
+    Yield Documents with their time span in metadata, one chunk at a time
+    (so the embedding pipeline can encode while later chunks are still being cut).
+    """
+    if not len(segments):
+        return
+    starts = np.frombuffer(segments.starts, dtype=np.float64)
+    ends = starts + np.frombuffer(segments.durations, dtype=np.float64)
+    for first, last in chunk_ranges(segments, max_tokens, overlap_segments):
+        metadata = {
+            "start": float(starts[first]),
+            "end": float(ends[last - 1]),
+            "first_segment": first,
+            "last_segment": last - 1,
+        }
+        if video_id:
+            metadata["video_id"] = video_id
+        text = " ".join(segments.text(i) for i in range(first, last) if segments.text(i))
+        metadata["chunk_hash"] = chunk_text_hash(text)
+        yield Document(page_content=text, metadata=metadata)
+
+
+def chunk_segments(segments: TranscriptSegments, video_id: str | None = None,
+                   max_tokens: int = DEFAULT_MAX_TOKENS, overlap_segments: int = DEFAULT_OVERLAP_SEGMENTS) -> list[Document]:
+    """
+    Split a transcript into Documents with their time span in metadata.
+    """
+    return list(iter_segment_chunks(segments, video_id, max_tokens, overlap_segments))
+
+
+# ================== CONTENT-DEFINED CHUNKING ==================
+# Fixed-size packing shifts every later boundary when YouTube revises a caption
+# or a mirror drops a sentence. Here a boundary goes after word i when a hash
+# of the last CDC_WINDOW words hits 1 in `divisor`, so boundaries depend only
+# on nearby content and realign right after a local edit; the chunks around the
+# edit change, the rest keep their text (and chunk_hash). min/max word limits
+# bound the chunk size; the expected size is about min_words + divisor.
+CDC_WINDOW = 8
+CDC_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _word_hashes(words: list[str]) -> np.ndarray:
+    return np.fromiter((xxhash.xxh64_intdigest(w.lower().encode("utf-8")) for w in words), dtype=np.uint64, count=len(words))
+
+
+def content_defined_boundaries(words: list[str], min_words: int = 40, max_words: int = 160, divisor: int = 80) -> list[int]:
+    """
+    End positions (exclusive) of each chunk over `words`.
+    """
+    n = len(words)
+    if n == 0:
+        return []
+    # Rolling window hash: wrap-around sum of word hashes over the last CDC_WINDOW
+    # words (cumsum differences), then a multiplicative mix so `% divisor` is uniform
+    with np.errstate(over="ignore"):
+        cumulative = np.concatenate(([np.uint64(0)], np.cumsum(_word_hashes(words), dtype=np.uint64)))
+        window = cumulative[1:] - cumulative[np.maximum(np.arange(1, n + 1) - CDC_WINDOW, 0)]
+        mixed = (window * CDC_MIX) >> np.uint64(32)
+    candidates = np.flatnonzero(mixed % np.uint64(divisor) == 0) + 1
+
+    ends = []
+    first = 0
+    while first < n:
+        i = int(np.searchsorted(candidates, first + min_words, side="left"))
+        end = int(candidates[i]) if i < len(candidates) else n
+        end = min(end, first + max_words, n)
+        ends.append(end)
+        first = end
+    return ends
+
+
+def iter_content_defined_chunks(segments: TranscriptSegments, video_id: str | None = None,
+                                min_words: int = 40, max_words: int = 160, divisor: int = 80):
+    """
+    Yield chunks cut at content-defined word boundaries, with time span in metadata.
+    A chunk's start/end come from the segments its first and last words belong to.
+    """
+    words, word_segment = [], array("q")
+    for i, (text, _, _) in enumerate(segments):
+        for word in text.split():
+            words.append(word)
+            word_segment.append(i)
+    if not words:
+        return
+    word_segment = np.frombuffer(word_segment, dtype=np.int64)
+    starts = np.frombuffer(segments.starts, dtype=np.float64)
+    ends = starts + np.frombuffer(segments.durations, dtype=np.float64)
+
+    first = 0
+    for end in content_defined_boundaries(words, min_words, max_words, divisor):
+        first_segment, last_segment = int(word_segment[first]), int(word_segment[end - 1])
+        text = " ".join(words[first:end])
+        metadata = {
+            "start": float(starts[first_segment]),
+            "end": float(ends[last_segment]),
+            "first_segment": first_segment,
+            "last_segment": last_segment,
+            "chunk_hash": chunk_text_hash(text),
+        }
+        if video_id:
+            metadata["video_id"] = video_id
+        yield Document(page_content=text, metadata=metadata)
+        first = end
+
+
+def chunk_content_defined(segments: TranscriptSegments, video_id: str | None = None,
+                          min_words: int = 40, max_words: int = 160, divisor: int = 80) -> list[Document]:
+    """
+    Split a transcript at content-defined word boundaries (see iter_content_defined_chunks).
+    """
+    return list(iter_content_defined_chunks(segments, video_id, min_words, max_words, divisor))
+
+
+# Chunker name -> (chunk generator, default parameters)
+CHUNKERS = {
+    "segments": (iter_segment_chunks, {"max_tokens": DEFAULT_MAX_TOKENS, "overlap_segments": DEFAULT_OVERLAP_SEGMENTS}),
+    "content": (iter_content_defined_chunks, {"min_words": 40, "max_words": 160, "divisor": 80}),
+}
+# RAG_CHUNKER=content switches the app and ingest paths to content-defined chunks
+DEFAULT_CHUNKER = os.getenv("RAG_CHUNKER", "segments")
+
+
+def format_chunk(doc: Document) -> str:
+    """
+    Chunk text for the chat prompt, prefixed with its time span when the
+    chunk carries one (indexes built by the old character splitter don't).
+    """
+    if "start" in doc.metadata:
+        return f"[{doc.metadata['start']}s - {doc.metadata['end']}s] {doc.page_content}"
+    return doc.page_content
+
+
+# ================== PERSISTENT CHUNK CACHE (SQLite) ==================
+# Chunk sets are stored per (video_id, config_hash), where config_hash covers
+# every chunker parameter plus CHUNKER_VERSION (bump it when chunk_segments
+# changes). Several configurations can live side by side for experiments, and
+# re-opening a thread or restarting the server reads the chunks back instead
+# of re-chunking. The transcript digest is kept so a replaced transcript
+# (e.g. an imported subtitle file) invalidates its chunk sets.
+CHUNKER_VERSION = 2
+
+
+def chunker_config(chunker: str = DEFAULT_CHUNKER, **params) -> dict:
+    """
+    Full parameter set of a chunker (defaults filled in), as hashed into config_hash.
+    """
+    if chunker not in CHUNKERS:
+        raise ValueError(f"Unknown chunker {chunker!r} (expected one of {', '.join(CHUNKERS)})")
+    return {"chunker": chunker, "version": CHUNKER_VERSION, **CHUNKERS[chunker][1], **params}
+
+
+def config_hash(config: dict) -> str:
+    return xxhash.xxh64_hexdigest(json.dumps(config, sort_keys=True).encode("utf-8"))
+
+
+def transcript_hash(segments: TranscriptSegments) -> str:
+    digest = xxhash.xxh64(segments.buffer.encode("utf-8"))
+    digest.update(segments.starts.tobytes())
+    return digest.hexdigest()
+
+
+def video_transcript_hash(video_id: str) -> str:
+    """
+    transcript_hash of the video's cached transcript (changes when it is re-fetched or imported).
+    """
+    return transcript_hash(fetch_segments(video_id))
+
+
+def _connect():
+    conn = sqlite3.connect(database=TRANSCRIPT_DB, timeout=30, check_same_thread=False)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS chunk_sets (
+        video_id TEXT,
+        config_hash TEXT,
+        config TEXT,
+        transcript_hash TEXT,
+        chunk_count INTEGER,
+        created_at TIMESTAMP,
+        PRIMARY KEY (video_id, config_hash)
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS chunks (
+        video_id TEXT,
+        config_hash TEXT,
+        chunk_index INTEGER,
+        text TEXT,
+        metadata TEXT,
+        PRIMARY KEY (video_id, config_hash, chunk_index)
+    )
+    """)
+    return conn
+
+
+def load_chunks(video_id: str, key: str, expected_transcript_hash: str | None = None) -> list[Document] | None:
+    """
+    Load a stored chunk set, or None if it is missing or was built from another transcript.
+    """
+    conn = _connect()
+    row = conn.execute(
+        "SELECT transcript_hash FROM chunk_sets WHERE video_id = ? AND config_hash = ?", (video_id, key)
+    ).fetchone()
+    if row is None or (expected_transcript_hash and row[0] != expected_transcript_hash):
+        conn.close()
+        return None
+    rows = conn.execute(
+        "SELECT text, metadata FROM chunks WHERE video_id = ? AND config_hash = ? ORDER BY chunk_index", (video_id, key)
+    ).fetchall()
+    conn.close()
+    return [Document(page_content=text, metadata=json.loads(metadata)) for text, metadata in rows]
+
+
+def save_chunks(video_id: str, key: str, config: dict, digest: str, chunks: list[Document]):
+    """
+    Store a chunk set, replacing any previous one for the same (video, config).
+    """
+    conn = _connect()
+    with conn:
+        conn.execute("DELETE FROM chunks WHERE video_id = ? AND config_hash = ?", (video_id, key))
+        conn.executemany(
+            "INSERT INTO chunks (video_id, config_hash, chunk_index, text, metadata) VALUES (?, ?, ?, ?, ?)",
+            [(video_id, key, i, chunk.page_content, json.dumps(chunk.metadata)) for i, chunk in enumerate(chunks)]
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO chunk_sets (video_id, config_hash, config, transcript_hash, chunk_count, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (video_id, key, json.dumps(config, sort_keys=True), digest, len(chunks), datetime.now())
+        )
+    conn.close()
+
+
+def iter_video_chunks(video_id: str, segments: TranscriptSegments | None = None,
+                      chunker: str = DEFAULT_CHUNKER, **params):
+    """
+    Yield the chunks for a video under the given chunker config. A stored set
+    is read back; otherwise chunks are yielded as they are cut and the set is
+    stored once the last one has been produced.
+    The stored set is checked against `segments`, or without them against the
+    cached transcript, so a re-fetched or imported transcript is chunked again.
+    """
+    config = chunker_config(chunker, **params)
+    key = config_hash(config)
+    if segments is None:
+        segments = fetch_segments(video_id)
+    digest = transcript_hash(segments)
+    chunks = load_chunks(video_id, key, digest)
+    if chunks is not None:
+        yield from chunks
+        return
+    chunk_fn = CHUNKERS[chunker][0]
+    chunks = []
+    for chunk in chunk_fn(segments, video_id=video_id, **{k: v for k, v in config.items() if k not in ("chunker", "version")}):
+        chunks.append(chunk)
+        yield chunk
+    save_chunks(video_id, key, config, digest, chunks)
+
+
+def get_video_chunks(video_id: str, segments: TranscriptSegments | None = None,
+                     chunker: str = DEFAULT_CHUNKER, **params) -> list[Document]:
+    """
+    Chunks for a video under the given chunker config, built and stored on first use.
+    """
+    return list(iter_video_chunks(video_id, segments, chunker, **params))
@@ -1,10 +1,160 @@
+import os
 import sqlite3
+from datetime import datetime
+import zstandard as zstd
+from testing_chatbot.rag.utils_transcript import fetch_segments
+from testing_chatbot.rag.utils_video_registry import link_thread_to_video, get_thread_video_id
+from testing_chatbot.rag.utils_background_writer import flush_background_writes
 
 
 # ================== DATABASE (SQLite) ==================
+# ================== CAPTION COMPRESSION (zstd) ==================
+# Captions are stored as zstd frames in transcripts.captions and in the
+# transcript service's cache, transcript_cache.snippets (legacy rows are
+# plain TEXT and still load). New rows are compressed with the most recently
+# trained shared dictionary; each frame records its dictionary ID, so old rows
+# keep decompressing after a new dictionary is trained.
+ZSTD_LEVEL = 9
+ZSTD_DICT_SIZE = 64 * 1024
+# table -> (key columns, compressed column) for every table holding captions
+COMPRESSED_CAPTION_COLUMNS = {
+    "transcripts": (("thread_id",), "captions"),
+    "transcript_cache": (("video_id", "languages"), "snippets"),
+}
+_zstd_dicts = {}
+
+
+def _create_dictionary_table(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS zstd_dictionaries (
+        dict_id INTEGER PRIMARY KEY,
+        dict_data BLOB,
+        created_at TIMESTAMP
+    )
+    """)
+
+
+def _load_dictionary(cursor, dict_id: int | None = None) -> zstd.ZstdCompressionDict | None:
+    """
+    Load a dictionary by ID, or the latest one when dict_id is None.
+    """
+    if dict_id is not None and dict_id in _zstd_dicts:
+        return _zstd_dicts[dict_id]
+    _create_dictionary_table(cursor)
+    if dict_id is None:
+        cursor.execute("SELECT dict_id, dict_data FROM zstd_dictionaries ORDER BY created_at DESC LIMIT 1")
+    else:
+        cursor.execute("SELECT dict_id, dict_data FROM zstd_dictionaries WHERE dict_id = ?", (dict_id,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    dictionary = zstd.ZstdCompressionDict(row[1])
+    _zstd_dicts[row[0]] = dictionary
+    return dictionary
+
+
+def compress_captions(cursor, captions: str) -> bytes:
+    """
+    Compress captions with the current shared dictionary (if one has been trained).
+    """
+    dictionary = _load_dictionary(cursor)
+    if dictionary is not None:
+        compressor = zstd.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dictionary)
+    else:
+        compressor = zstd.ZstdCompressor(level=ZSTD_LEVEL)
+    return compressor.compress(captions.encode("utf-8"))
+
+
+def decompress_captions(cursor, stored) -> str | None:
+    """
+    Turn a stored captions value back into text (plain TEXT rows pass through).
+    """
+    if stored is None or isinstance(stored, str):
+        return stored
+    dict_id = zstd.get_frame_parameters(stored).dict_id
+    if dict_id:
+        dictionary = _load_dictionary(cursor, dict_id)
+        if dictionary is None:
+            raise ValueError(f"Missing zstd dictionary {dict_id} for stored captions")
+        decompressor = zstd.ZstdDecompressor(dict_data=dictionary)
+    else:
+        decompressor = zstd.ZstdDecompressor()
+    return decompressor.decompress(stored).decode("utf-8")
+
+
+def _caption_tables(cursor) -> list[str]:
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    existing = {row[0] for row in cursor.fetchall()}
+    return [table for table in COMPRESSED_CAPTION_COLUMNS if table in existing]
+
+
+def train_captions_dictionary(conn, sample_size: int = 4096) -> int | None:
+    """
+    Train a shared zstd dictionary on all stored captions (thread captions and
+    cached snippets) and make it current. Returns the dictionary ID, or None
+    if there is too little data to train on.
+    """
+    cursor = conn.cursor()
+    samples = []
+    for table in _caption_tables(cursor):
+        _, column = COMPRESSED_CAPTION_COLUMNS[table]
+        cursor.execute(f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL")
+        for (stored,) in cursor.fetchall():
+            data = decompress_captions(cursor, stored).encode("utf-8")
+            samples.extend(data[i:i + sample_size] for i in range(0, len(data), sample_size))
+    try:
+        dictionary = zstd.train_dictionary(ZSTD_DICT_SIZE, samples, level=ZSTD_LEVEL)
+    except zstd.ZstdError as e:
+        print(f"⚠️ Not enough captions to train a zstd dictionary ({len(samples)} samples): {e}")
+        return None
+    _create_dictionary_table(cursor)
+    cursor.execute(
+        "INSERT OR REPLACE INTO zstd_dictionaries (dict_id, dict_data, created_at) VALUES (?, ?, ?)",
+        (dictionary.dict_id(), dictionary.as_bytes(), datetime.now())
+    )
+    conn.commit()
+    _zstd_dicts[dictionary.dict_id()] = dictionary
+    return dictionary.dict_id()
+
+
+def migrate_transcripts_to_zstd(database: str = "ragDatabase.db"):
+    """
+    One-off migration: train a dictionary on existing captions, then rewrite
+    every row of transcripts and transcript_cache (plain TEXT or older frames)
+    with it and VACUUM the database.
+    """
+    conn = sqlite3.connect(database=database, check_same_thread=False)
+    cursor = conn.cursor()
+    tables = _caption_tables(cursor)
+    if not tables:
+        print("⚠️ No transcripts or transcript cache to migrate")
+        conn.close()
+        return
+    size_before = os.path.getsize(database)
+    train_captions_dictionary(conn)
+    migrated = {}
+    for table in tables:
+        keys, column = COMPRESSED_CAPTION_COLUMNS[table]
+        cursor.execute(f"SELECT {', '.join(keys)}, {column} FROM {table}")
+        rows = cursor.fetchall()
+        for *key, stored in rows:
+            captions = decompress_captions(cursor, stored)
+            if captions is not None:
+                cursor.execute(
+                    f"UPDATE {table} SET {column} = ? WHERE {' AND '.join(f'{name} = ?' for name in keys)}",
+                    (compress_captions(cursor, captions), *key)
+                )
+        migrated[table] = len(rows)
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    counts = ", ".join(f"{count} {table} rows" for table, count in migrated.items())
+    print(f"✅ Migrated {counts}: {size_before / 1024:.0f} KB → {os.path.getsize(database) / 1024:.0f} KB")
+
+
 def save_captions_to_db(thread_id: str, captions: str):
     """
-    Save transcript captions into database.
+    Save transcript captions into database (zstd-compressed).
     """
     conn = sqlite3.connect(database="ragDatabase.db", check_same_thread=False)
     cursor = conn.cursor()
@@ -16,14 +166,14 @@ def save_captions_to_db(thread_id: str, captions: str):
     """)
     cursor.execute("""
     INSERT OR REPLACE INTO transcripts (thread_id, captions) VALUES (?, ?)
-    """, (thread_id, captions))
+    """, (thread_id, compress_captions(cursor, captions)))
     conn.commit()
     conn.close()
 
 
 def save_youtube_url_to_db(thread_id: str, youtube_url: str):
     """
-    Save YouTube video URL for a thread.
+    Save YouTube video URL for a thread (and link the thread to its video).
     """
     conn = sqlite3.connect(database="ragDatabase.db", check_same_thread=False)
     cursor = conn.cursor()
@@ -39,17 +189,33 @@ def save_youtube_url_to_db(thread_id: str, youtube_url: str):
     """, (thread_id, youtube_url))
     conn.commit()
     conn.close()
+    link_thread_to_video(thread_id, youtube_url)
 
 
 def load_captions_from_db(thread_id: str) -> str | None:
     """
     Load transcript captions for a thread.
+    Falls back to the transcript of the thread's video through the transcript
+    service (its cache, or the configured provider when that isn't cacheable,
+    e.g. replay/record).
     """
     conn = sqlite3.connect(database="ragDatabase.db", check_same_thread=False)
     cursor = conn.cursor()
-    cursor.execute("SELECT captions FROM transcripts WHERE thread_id = ?", (thread_id,))
-    row = cursor.fetchone()
-    return row[0] if row else None
+    try:
+        cursor.execute("SELECT captions FROM transcripts WHERE thread_id = ?", (thread_id,))
+        row = cursor.fetchone()
+    except sqlite3.OperationalError:
+        row = None  # Table not created yet
+    captions = decompress_captions(cursor, row[0]) if row else None
+    conn.close()
+    if captions is None:
+        video_id = get_thread_video_id(thread_id)
+        if video_id:
+            try:
+                captions = fetch_segments(video_id).to_caption_string() or None
+            except Exception as e:
+                print(f"❌ No transcript for thread {thread_id} (video {video_id}): {e}")
+    return captions
 
 
 def load_url_from_db(thread_id: str) -> str | None:
@@ -68,15 +234,20 @@ def delete_all_threads_from_db():
     """
     Delete all chat threads & related data from database.
     """
+    flush_background_writes()  # a queued save must not re-create a deleted thread
     try:
         conn = sqlite3.connect(r"C:\Users\prana\Desktop\PROJECTS\tubetalk.ai\ragDataBase.db")
         cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+        # sqlite-vec tables (vec_*) need the extension; they are dropped below
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'vec!_%' ESCAPE '!';")
         tables = cursor.fetchall()
         for table_name in tables:
             cursor.execute(f"DELETE FROM {table_name[0]};")
         conn.commit()
         conn.close()
+        if os.getenv("VECTOR_BACKEND", "faiss") == "sqlite-vec":
+            from testing_chatbot.rag.utils_sqlite_vec import clear_sqlite_vec
+            clear_sqlite_vec()
         print("✅ All threads deleted successfully.")
     except Exception as e:
         print("❌ Error while deleting threads:", e)
@@ -93,3 +264,7 @@ def check_is_thread_empty_db(conn, thread_id: str) -> bool:
     except sqlite3.OperationalError:
         return True  # Table not created yet
     return count == 0
+
+
+if __name__ == "__main__":
+    migrate_transcripts_to_zstd()
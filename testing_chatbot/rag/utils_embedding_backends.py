@@ -0,0 +1,79 @@
+import re
+import numpy as np
+import xxhash
+from langchain_core.embeddings import Embeddings
+
+
+# ================== EMBEDDING BACKENDS ==================
+# Backend behind get_embeddings(), chosen by the model name:
+#   EMBEDDING_MODEL=sentence-transformers/all-MiniLM-L6-v2   (default, HuggingFace)
+#   EMBEDDING_MODEL=hashing-384                             (offline, any dimension)
+# A backend is a loader(model_name, device) -> langchain Embeddings registered
+# under a name prefix. `hashing-<dim>` needs no weights or network and is
+# deterministic, so indexing and search throughput can be benchmarked (and
+# the RAG pipeline exercised) on isolated machines. Its vectors carry lexical
+# overlap only: use it for speed and plumbing, not for answer quality.
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Signed feature hashing of words and word bigrams into `dim` buckets,
+    L2-normalized. Same text -> same vector, in every process.
+    """
+    def __init__(self, dim: int = 384, seed: int = 0):
+        self.dim = dim
+        self.seed = seed
+
+    def _features(self, text: str) -> list[str]:
+        words = TOKEN_PATTERN.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            if not features:
+                continue
+            hashes = np.fromiter((xxhash.xxh64_intdigest(f.encode("utf-8"), self.seed) for f in features),
+                                 dtype=np.uint64, count=len(features))
+            buckets = (hashes % np.uint64(self.dim)).astype(np.int64)
+            signs = np.where((hashes >> np.uint64(63)) == 1, -1.0, 1.0).astype(np.float32)
+            np.add.at(vectors[row], buckets, signs)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+def _load_huggingface(model_name: str, device: str) -> Embeddings:
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name=model_name, model_kwargs={"device": device})
+
+
+def _load_hashing(model_name: str, device: str) -> Embeddings:
+    dim = model_name.split("-", 1)[1] if "-" in model_name else "384"
+    return HashingEmbeddings(dim=int(dim))
+
+
+# Model name prefix -> loader; the first matching prefix wins, "" is the fallback
+_backends = {"hashing": _load_hashing, "": _load_huggingface}
+
+
+def register_embedding_backend(prefix: str, loader):
+    """
+    Route model names starting with `prefix` to loader(model_name, device).
+    """
+    global _backends
+    # New prefixes go first so they take precedence over the HuggingFace fallback
+    _backends = {prefix: loader, **{k: v for k, v in _backends.items() if k != prefix}}
+
+
+def load_backend_model(model_name: str, device: str) -> Embeddings:
+    for prefix, loader in _backends.items():
+        if model_name.startswith(prefix):
+            return loader(model_name, device)
+    raise ValueError(f"No embedding backend for model {model_name!r}")
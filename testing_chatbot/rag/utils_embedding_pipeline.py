@@ -0,0 +1,135 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from langchain_community.vectorstores import FAISS
+from testing_chatbot.rag.utils_embeddings import EMBEDDING_DEVICE, get_embeddings, load_embedding_model
+
+
+# ================== BATCHED EMBEDDING PIPELINE ==================
+# Chunks are pulled from any iterable by a producer thread and grouped into
+# batches of EMBED_BATCH_SIZE, so chunking (or reading the chunk store) runs
+# while earlier batches are being encoded. Batches go through the shared model's
+# on-disk cache; misses are encoded either in this process (torch limited to
+# EMBED_THREADS intra-op threads) or, with EMBED_PROCESSES > 0, spread across a
+# process pool where each worker loads its own copy of the model once.
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0"))      # 0 = torch default
+EMBED_PROCESSES = int(os.getenv("EMBED_PROCESSES", "0"))  # 0 = encode in-process
+QUEUE_DEPTH = 4
+
+_pools = {}
+_pools_lock = threading.Lock()
+_worker_model = None
+
+
+def set_torch_threads(threads: int):
+    """
+    Limit torch intra-op parallelism (no-op when threads is 0 or torch is missing).
+    """
+    if threads:
+        try:
+            import torch
+        except ImportError:
+            return
+        torch.set_num_threads(threads)
+
+
+def _init_worker(model_name: str, threads: int):
+    global _worker_model
+    set_torch_threads(threads)
+    _worker_model = load_embedding_model(model_name, EMBEDDING_DEVICE)
+
+
+def _worker_encode(texts: list[str]) -> list[list[float]]:
+    return _worker_model.embed_documents(texts)
+
+
+def get_process_pool(model_name: str, processes: int, threads: int) -> ProcessPoolExecutor:
+    """
+    Long-lived pool per (model, size): workers pay the model load once, not per call.
+    """
+    key = (model_name, processes, threads)
+    with _pools_lock:
+        if key not in _pools:
+            threads = threads or max(1, (os.cpu_count() or 1) // processes)
+            _pools[key] = ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(model_name, threads))
+        return _pools[key]
+
+
+def _produce_batches(chunks, batch_size: int, batches: queue.Queue, errors: list):
+    try:
+        batch = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) == batch_size:
+                batches.put(batch)
+                batch = []
+        if batch:
+            batches.put(batch)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        batches.put(None)
+
+
+def embed_chunks(chunks, embeddings=None, batch_size: int = EMBED_BATCH_SIZE,
+                 threads: int = EMBED_THREADS, processes: int = EMBED_PROCESSES) -> tuple[list, list, dict]:
+    """
+    Embed an iterable of Documents. Returns (documents, vectors, stats) with
+    stats holding chunk count, batch count, seconds and chunks/sec.
+    """
+    embeddings = embeddings or get_embeddings()
+    started = time.perf_counter()
+    batches = queue.Queue(maxsize=QUEUE_DEPTH)
+    errors = []
+    producer = threading.Thread(target=_produce_batches, args=(chunks, batch_size, batches, errors), daemon=True)
+    producer.start()
+
+    if processes:
+        pool = get_process_pool(embeddings.model_name, processes, threads)
+
+        def encode(texts):
+            return pool.submit(_worker_encode, texts).result()
+    else:
+        set_torch_threads(threads)
+        encode = embeddings.encode
+
+    documents, futures = [], []
+    # One in-flight batch per worker process (one in total when encoding in-process)
+    with ThreadPoolExecutor(max_workers=max(1, processes)) as dispatcher:
+        while (batch := batches.get()) is not None:
+            documents.extend(batch)
+            futures.append(dispatcher.submit(embeddings.cached_embed, [doc.page_content for doc in batch], encode))
+        vectors = [vector for future in futures for vector in future.result()]
+    producer.join()
+    if errors:
+        raise errors[0]
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "chunks": len(documents),
+        "batches": len(futures),
+        "seconds": elapsed,
+        "chunks_per_second": len(documents) / elapsed if elapsed else 0.0,
+        "batch_size": batch_size,
+        "threads": threads,
+        "processes": processes,
+    }
+    print(f"🧮 Embedded {stats['chunks']} chunks in {elapsed:.2f}s ({stats['chunks_per_second']:.0f} chunks/s, "
+          f"batch={batch_size}, threads={threads or 'default'}, processes={processes})")
+    return documents, vectors, stats
+
+
+def build_vector_store(chunks, embeddings=None, **options):
+    """
+    Embed chunks through the pipeline and build a FAISS store from the vectors.
+    """
+    embeddings = embeddings or get_embeddings()
+    documents, vectors, _ = embed_chunks(chunks, embeddings, **options)
+    return FAISS.from_embeddings(
+        [(doc.page_content, vector) for doc, vector in zip(documents, vectors)],
+        embeddings,
+        metadatas=[doc.metadata for doc in documents],
+    )
@@ -0,0 +1,233 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import xxhash
+from langchain_core.embeddings import Embeddings
+from testing_chatbot.rag.utils_transcript import TRANSCRIPT_DB
+from testing_chatbot.rag.utils_embedding_backends import load_backend_model
+
+
+# ================== EMBEDDING MODEL REGISTRY ==================
+# One embedding model instance per (model name, device) for the whole process.
+# Chunk embedding (generate_embeddings), index loading (load_embeddings_faiss)
+# and query embedding (the FAISS retriever calls embed_query on the same
+# object) all share it, so a new chat or a sidebar thread click no longer
+# reloads MiniLM. Loading is serialized by a lock; encoding is not.
+#
+# Document embeddings are also cached on disk in `embedding_cache`, keyed by
+# (model name, xxh64 of the whitespace-normalized text) and stored as packed
+# float32 blobs, so re-ingesting a lecture or rebuilding a cleared index only
+# encodes text the model has never seen. EMBEDDING_CACHE=0 turns it off.
+#
+# Query embeddings are kept in an in-memory LRU of QUERY_CACHE_SIZE entries,
+# keyed by the normalized question, so repeat questions skip the encode.
+#
+# EMBEDDING_MODEL picks the model and with it the backend (see
+# utils_embedding_backends), e.g. EMBEDDING_MODEL=hashing-384 runs offline.
+# Saved indexes record the model that built them (see utils_index_cache and
+# utils_shared_index); one built by another model counts as not indexed.
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "cpu")
+
+EMBEDDING_CACHE_BATCH = 500
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+# ================== EMBEDDING CACHE (SQLite) ==================
+def _connect():
+    conn = sqlite3.connect(database=TRANSCRIPT_DB, timeout=30, check_same_thread=False)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS embedding_cache (
+        model TEXT,
+        text_hash TEXT,
+        vector BLOB,
+        PRIMARY KEY (model, text_hash)
+    )
+    """)
+    return conn
+
+
+def embedding_text_hash(text: str) -> str:
+    return xxhash.xxh64_hexdigest(" ".join(text.split()).encode("utf-8"))
+
+
+def normalize_query(text: str) -> str:
+    """
+    Case, whitespace and trailing punctuation don't change what's being asked.
+    """
+    return " ".join(text.lower().split()).rstrip("?!. ")
+
+
+def load_cached_embeddings(model_name: str, text_hashes: list[str]) -> dict[str, list[float]]:
+    """
+    Cached vectors for the given text hashes (missing ones are simply absent).
+    """
+    found = {}
+    conn = _connect()
+    unique = list(dict.fromkeys(text_hashes))
+    for i in range(0, len(unique), EMBEDDING_CACHE_BATCH):
+        batch = unique[i:i + EMBEDDING_CACHE_BATCH]
+        rows = conn.execute(
+            f"SELECT text_hash, vector FROM embedding_cache WHERE model = ? AND text_hash IN ({','.join('?' * len(batch))})",
+            (model_name, *batch)
+        ).fetchall()
+        for text_hash, blob in rows:
+            found[text_hash] = np.frombuffer(blob, dtype=np.float32).tolist()
+    conn.close()
+    return found
+
+
+def save_cached_embeddings(model_name: str, items: list[tuple[str, list[float]]]):
+    conn = _connect()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO embedding_cache (model, text_hash, vector) VALUES (?, ?, ?)",
+            [(model_name, text_hash, np.asarray(vector, dtype=np.float32).tobytes()) for text_hash, vector in items]
+        )
+    conn.close()
+
+
+# ================== SHARED MODEL ==================
+class SharedEmbeddings(Embeddings):
+    """
+    Process-wide embeddings wrapper: serves documents from the on-disk cache and
+    repeat queries from an LRU, encodes only the misses, and records load time and per-batch encode timings.
+    """
+    def __init__(self, inner: Embeddings, model_name: str, load_seconds: float, use_cache: bool = True,
+                 query_cache_size: int = QUERY_CACHE_SIZE):
+        self.inner = inner
+        self.model_name = model_name
+        self.load_seconds = load_seconds
+        self.use_cache = use_cache
+        self.query_cache_size = query_cache_size
+        self._queries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"document_batches": 0, "documents": 0, "document_seconds": 0.0,
+                       "cache_hits": 0, "cache_misses": 0,
+                       "queries": 0, "query_seconds": 0.0, "query_cache_hits": 0, "query_cache_misses": 0,
+                       "last_batch": None}
+
+    def encode(self, texts: list[str]) -> list[list[float]]:
+        """
+        Run the model on `texts` (no cache), recording batch timings.
+        """
+        started = time.perf_counter()
+        vectors = self.inner.embed_documents(texts)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["document_batches"] += 1
+            self._stats["documents"] += len(texts)
+            self._stats["document_seconds"] += elapsed
+            self._stats["last_batch"] = {"size": len(texts), "seconds": elapsed,
+                                         "texts_per_second": len(texts) / elapsed if elapsed else 0.0}
+        return vectors
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.cached_embed(texts, self.encode)
+
+    def cached_embed(self, texts: list[str], encode) -> list[list[float]]:
+        """
+        Serve `texts` from the cache and call encode(misses) for the rest
+        (the embedding pipeline passes a process-pool encoder here).
+        """
+        if not self.use_cache or not texts:
+            return encode(texts)
+        hashes = [embedding_text_hash(text) for text in texts]
+        cached = load_cached_embeddings(self.model_name, hashes)
+        misses = list(dict.fromkeys(h for h in hashes if h not in cached))
+        if misses:
+            text_by_hash = dict(zip(hashes, texts))
+            vectors = encode([text_by_hash[h] for h in misses])
+            new = list(zip(misses, vectors))
+            save_cached_embeddings(self.model_name, new)
+            cached.update(new)
+        with self._lock:
+            self._stats["cache_hits"] += len(texts) - len(misses)
+            self._stats["cache_misses"] += len(misses)
+        return [cached[h] for h in hashes]
+
+    def embed_query(self, text: str) -> list[float]:
+        key = normalize_query(text)
+        with self._lock:
+            vector = self._queries.get(key)
+            if vector is not None:
+                self._queries.move_to_end(key)
+                self._stats["query_cache_hits"] += 1
+                return vector
+            self._stats["query_cache_misses"] += 1
+        started = time.perf_counter()
+        vector = self.inner.embed_query(text)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["queries"] += 1
+            self._stats["query_seconds"] += elapsed
+            if self.query_cache_size:
+                self._queries[key] = vector
+                while len(self._queries) > self.query_cache_size:
+                    self._queries.popitem(last=False)
+        return vector
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["model_name"] = self.model_name
+        stats["load_seconds"] = self.load_seconds
+        stats["documents_per_second"] = stats["documents"] / stats["document_seconds"] if stats["document_seconds"] else 0.0
+        stats["avg_query_ms"] = 1000 * stats["query_seconds"] / stats["queries"] if stats["queries"] else 0.0
+        return stats
+
+
+def load_embedding_model(model_name: str, device: str) -> Embeddings:
+    return load_backend_model(model_name, device)
+
+
+def get_embeddings(model_name: str = EMBEDDING_MODEL, device: str = EMBEDDING_DEVICE) -> SharedEmbeddings:
+    """
+    Return the shared embedding model, loading it on first use.
+    """
+    key = (model_name, device)
+    model = _models.get(key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                started = time.perf_counter()
+                inner = load_embedding_model(model_name, device)
+                model = SharedEmbeddings(inner, model_name, time.perf_counter() - started,
+                                         use_cache=os.getenv("EMBEDDING_CACHE", "1") != "0")
+                _models[key] = model
+                print(f"✅ Embedding model {model_name} loaded in {model.load_seconds:.1f}s")
+    return model
+
+
+def warmup_embeddings(model_name: str = EMBEDDING_MODEL, background: bool = False):
+    """
+    Load the model and run one encode so the first real request doesn't pay for it.
+    With background=True this happens in a daemon thread. EMBEDDINGS_WARMUP=0 disables it.
+    """
+    if os.getenv("EMBEDDINGS_WARMUP", "1") == "0":
+        return None
+
+    def warm():
+        get_embeddings(model_name).inner.embed_query("warmup")
+
+    if background:
+        thread = threading.Thread(target=warm, name="embeddings-warmup", daemon=True)
+        thread.start()
+        return thread
+    warm()
+    return None
+
+
+def embedding_metrics() -> list[dict]:
+    """
+    Load time and encode stats of every model loaded in this process.
+    """
+    return [model.metrics() for model in list(_models.values())]
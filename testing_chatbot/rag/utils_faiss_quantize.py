@@ -0,0 +1,90 @@
+import os
+import faiss
+
+
+# ================== QUANTIZED INDEX STORAGE ==================
+# Saved FAISS indexes can store their vectors scalar-quantized instead of as
+# float32. FAISS_QUANTIZATION picks the recall/size tradeoff:
+#   none  float32, exact (default)
+#   fp16  vectors 2x smaller, recall@3 practically unchanged
+#   int8  vectors 4x smaller, per-dimension trained ranges, small recall loss
+#   int4  vectors 8x smaller, noticeably lossy on clusters of similar chunks
+# Only vectors shrink: chunk text lives in the chunk store. faiss.read_index
+# handles any index type, so quantized and float32 directories load the same
+# way (save_vector_store in utils_index_cache applies the setting); searches,
+# reconstruct (used when refreshing an index) and live-ingest appends keep
+# working. The shared video index (see utils_shared_index) is saved through
+# quantize_id_mapped_index, which keeps its vector IDs, HNSW graph or IVF lists.
+# Measure the tradeoff on real lectures with bench_quantization.
+FAISS_QUANTIZATION = os.getenv("FAISS_QUANTIZATION", "none")
+
+QUANTIZERS = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+    "int4": faiss.ScalarQuantizer.QT_4bit,
+}
+
+
+def quantize_index(index, quantization: str = FAISS_QUANTIZATION):
+    """
+    Scalar-quantized copy of a flat index. "none", an empty index (nothing to
+    train on) or an already quantized one (float32 can't be recovered from
+    codes) is returned unchanged.
+    """
+    if quantization == "none" or not index.ntotal or isinstance(faiss.downcast_index(index), faiss.IndexScalarQuantizer):
+        return index
+    if quantization not in QUANTIZERS:
+        raise ValueError(f"Unknown FAISS_QUANTIZATION {quantization!r}, expected none/{'/'.join(QUANTIZERS)}")
+    quantized = faiss.IndexScalarQuantizer(index.d, QUANTIZERS[quantization], index.metric_type)
+    vectors = index.reconstruct_n(0, index.ntotal)
+    quantized.train(vectors)
+    quantized.add(vectors)
+    return quantized
+
+
+def _is_quantized(index) -> bool:
+    return isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexHNSWSQ, faiss.IndexIVFScalarQuantizer))
+
+
+def quantize_id_mapped_index(index, quantization: str = FAISS_QUANTIZATION):
+    """
+    Scalar-quantized copy of an IndexIDMap2 over a Flat, HNSW or IVF index,
+    with the same vector IDs. The HNSW graph and IVF coarse quantizer are
+    reused, so nothing is rebuilt; only the stored vectors are re-encoded.
+    Unchanged in the same cases as quantize_index.
+    """
+    id_map = faiss.downcast_index(index)
+    inner = faiss.downcast_index(id_map.index)
+    if quantization == "none" or not index.ntotal or _is_quantized(inner):
+        return index
+    if quantization not in QUANTIZERS:
+        raise ValueError(f"Unknown FAISS_QUANTIZATION {quantization!r}, expected none/{'/'.join(QUANTIZERS)}")
+    ids = faiss.vector_to_array(id_map.id_map)
+    vectors = index.reconstruct_batch(ids)
+    if isinstance(inner, faiss.IndexHNSW):
+        quantized = faiss.IndexHNSWSQ(index.d, QUANTIZERS[quantization], inner.hnsw.nb_neighbors(1), index.metric_type)
+        quantized_map = faiss.IndexIDMap2(quantized)
+        quantized.storage.train(vectors)
+        quantized.storage.add(vectors)
+        quantized.hnsw = inner.hnsw
+        quantized.ntotal = inner.ntotal
+        quantized.is_trained = True
+        faiss.copy_array_to_vector(ids, quantized_map.id_map)
+        quantized_map.ntotal = index.ntotal
+        quantized_map.construct_rev_map()
+        return quantized_map
+    if isinstance(inner, faiss.IndexIVF):
+        # A copy of the trained coarse quantizer: the source index may be freed first
+        quantized = faiss.IndexIVFScalarQuantizer(faiss.clone_index(inner.quantizer), index.d, inner.nlist, QUANTIZERS[quantization], index.metric_type)
+    else:
+        quantized = faiss.IndexScalarQuantizer(index.d, QUANTIZERS[quantization], index.metric_type)
+    quantized_map = faiss.IndexIDMap2(quantized)
+    quantized_map.train(vectors)
+    quantized_map.add_with_ids(vectors, ids)
+    if isinstance(quantized, faiss.IndexIVF):
+        quantized.make_direct_map()
+    return quantized_map
+
+
+def index_dir_size(load_dir: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(load_dir) if entry.is_file())
@@ -0,0 +1,229 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+import faiss
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from testing_chatbot.rag.utils_embeddings import DEFAULT_EMBEDDING_MODEL
+from testing_chatbot.rag.utils_faiss_quantize import FAISS_QUANTIZATION, quantize_index
+from testing_chatbot.rag.utils_chunk_store import (
+    STORE_FILE, ChunkStoreDocstore, PositionIds, load_all_documents, read_store_file, save_chunk_store, write_store_file
+)
+
+
+# ================== MEMORY-MAPPED INDEXES + LRU ==================
+# Every sidebar click used to read a whole FAISS index into RAM, and each
+# session kept its own copy alive in st.session_state. Indexes are now opened
+# memory-mapped (INDEX_MMAP=0 reads them fully): the vectors stay in the OS
+# page cache, shared by every session and every server process on the same
+# lecture. Loaded stores are kept in a process-wide LRU keyed by index
+# directory, bounded by INDEX_CACHE_MB (the current index file's size; chunk text
+# stays in the chunk store, see utils_chunk_store), and reloaded when the
+# directory has been rewritten. Sessions get the cached store, not a private
+# copy. index_cache_metrics() reports resident size, load latency and hit ratio.
+#
+# A mapped index is read-only (adding to it aborts inside FAISS), so writers
+# such as live ingest load with writable=True, which bypasses the cache.
+INDEX_MMAP = os.getenv("INDEX_MMAP", "1") != "0"
+INDEX_CACHE_MB = float(os.getenv("INDEX_CACHE_MB", "512"))
+MMAP_FLAGS = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+
+
+def read_index(path: str, mmap: bool = INDEX_MMAP):
+    return faiss.read_index(path, MMAP_FLAGS) if mmap else faiss.read_index(path)
+
+
+def stored_documents(vector_store) -> list[Document]:
+    """
+    Every chunk of a FAISS store in index order, whatever its docstore.
+    """
+    if isinstance(vector_store.docstore, ChunkStoreDocstore):
+        return load_all_documents(vector_store.docstore.store_id)
+    ids = vector_store.index_to_docstore_id
+    return [vector_store.docstore.search(ids[position]) for position in range(vector_store.index.ntotal)]
+
+
+def _fsync(path: str):
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def saved_index_model(load_dir: str) -> str:
+    """
+    Embedding model that built a saved index; indexes saved before the model
+    was recorded were all built with the default one.
+    """
+    store = read_store_file(load_dir)
+    return (store or {}).get("model") or DEFAULT_EMBEDDING_MODEL
+
+
+def saved_index_exists(load_dir: str, model_name: str | None = None) -> bool:
+    """
+    True once a save into `load_dir` has completed (or it holds a FAISS.save_local
+    pickle); a directory left behind by a save that crashed doesn't count, nor,
+    if `model_name` is given, one built by another embedding model.
+    """
+    store = read_store_file(load_dir)
+    if store is not None:
+        complete = os.path.exists(os.path.join(load_dir, store["index_file"]))
+    else:
+        complete = all(os.path.exists(os.path.join(load_dir, name)) for name in ("index.faiss", "index.pkl"))
+    return complete and (model_name is None or saved_index_model(load_dir) == model_name)
+
+
+def saved_index_size(load_dir: str) -> int:
+    store = read_store_file(load_dir)
+    return os.path.getsize(os.path.join(load_dir, store["index_file"])) + os.path.getsize(os.path.join(load_dir, STORE_FILE))
+
+
+def _remove_stale_files(save_dir: str, keep: set[str]):
+    for name in os.listdir(save_dir):
+        if name in keep or name == STORE_FILE:
+            continue
+        try:
+            os.remove(os.path.join(save_dir, name))
+        except OSError:
+            pass  # still mapped on Windows; the next save retries
+
+
+def save_vector_store(vector_store, save_dir: str, quantization: str = FAISS_QUANTIZATION):
+    """
+    Save the index (quantized on disk per FAISS_QUANTIZATION; the in-memory
+    store keeps float32) with its chunks in the chunk store. Each save writes
+    index-<store_id>.faiss and then atomically replaces chunks.json to point at
+    it, so readers (and processes that have the old index memory-mapped) see
+    either the old generation or the new one, never a half-written file.
+    """
+    documents = stored_documents(vector_store)
+    store_id = save_chunk_store(save_dir, documents)
+    os.makedirs(save_dir, exist_ok=True)
+    previous = read_store_file(save_dir)
+    index_file = f"index-{store_id}.faiss"
+    index_path = os.path.join(save_dir, index_file)
+    faiss.write_index(quantize_index(vector_store.index, quantization), index_path)
+    _fsync(index_path)
+    model_name = getattr(vector_store.embedding_function, "model_name", None)
+    write_store_file(save_dir, store_id, len(documents), index_file, model_name)
+    # The previous generation stays for readers that resolved it just before the switch
+    _remove_stale_files(save_dir, {index_file, previous["index_file"] if previous else None})
+
+
+def _load_pickled(load_dir: str, embeddings):
+    """
+    A directory saved by FAISS.save_local: load it once and move its chunks
+    into the chunk store.
+    """
+    vector_store = FAISS.load_local(load_dir, embeddings, allow_dangerous_deserialization=True)
+    save_vector_store(vector_store, load_dir, quantization="none")
+    print(f"📦 Migrated {load_dir} from index.pkl to the chunk store")
+
+
+def load_vector_store(load_dir: str, embeddings, writable: bool = False):
+    """
+    Load a saved index without unpickling anything: the index is memory-mapped
+    (unless `writable` or INDEX_MMAP=0) and chunks are read from the chunk store
+    on demand. writable=True gives a private copy with every chunk in memory.
+    """
+    if read_store_file(load_dir) is None:
+        _load_pickled(load_dir, embeddings)
+    for attempt in range(3):
+        store = read_store_file(load_dir)
+        try:
+            index = read_index(os.path.join(load_dir, store["index_file"]), mmap=INDEX_MMAP and not writable)
+            break
+        except RuntimeError:
+            # Two saves landed between reading chunks.json and opening its file; read the pointer again
+            if attempt == 2:
+                raise
+    if writable:
+        documents = load_all_documents(store["store_id"])
+        docstore = InMemoryDocstore({str(position): doc for position, doc in enumerate(documents)})
+        return FAISS(embeddings, index, docstore, {position: str(position) for position in range(len(documents))})
+    return FAISS(embeddings, index, ChunkStoreDocstore(store["store_id"]), PositionIds(index.ntotal))
+
+
+def _saved_mtime(load_dir: str) -> int:
+    # chunks.json is replaced last by every save; pickled directories don't have one yet
+    path = os.path.join(load_dir, STORE_FILE)
+    return os.stat(path if os.path.exists(path) else os.path.join(load_dir, "index.faiss")).st_mtime_ns
+
+
+class IndexCache:
+    """
+    LRU of loaded vector stores under a byte budget (see get_cached_vector_store).
+    """
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()  # load_dir -> (vector_store, mtime, size)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "load_seconds": 0.0, "last_load_ms": 0.0}
+
+    def get(self, load_dir: str, embeddings):
+        mtime = _saved_mtime(load_dir)
+        with self._lock:
+            entry = self._entries.get(load_dir)
+            if entry is not None and entry[1] == mtime:
+                self._entries.move_to_end(load_dir)
+                self._stats["hits"] += 1
+                return entry[0]
+            self._stats["misses"] += 1
+
+        started = time.perf_counter()
+        vector_store = load_vector_store(load_dir, embeddings)
+        elapsed = time.perf_counter() - started
+        # Re-read: loading a pickled directory migrates (rewrites) it
+        mtime = _saved_mtime(load_dir)
+        size = saved_index_size(load_dir)
+        with self._lock:
+            self._stats["load_seconds"] += elapsed
+            self._stats["last_load_ms"] = 1000 * elapsed
+            self._entries[load_dir] = (vector_store, mtime, size)
+            self._entries.move_to_end(load_dir)
+            # The newest entry always stays, even if it alone is over budget
+            while len(self._entries) > 1 and self._resident_bytes() > self.budget_bytes:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        print(f"📂 Loaded {load_dir} in {1000 * elapsed:.1f} ms ({'mmap' if INDEX_MMAP else 'read'}, {size / 1e6:.1f} MB)")
+        return vector_store
+
+    def _resident_bytes(self) -> int:
+        return sum(size for _, _, size in self._entries.values())
+
+    def invalidate(self, load_dir: str | None = None):
+        with self._lock:
+            if load_dir is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(load_dir, None)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["resident_mb"] = self._resident_bytes() / 1e6
+        stats["budget_mb"] = self.budget_bytes / 1e6
+        stats["mmap"] = INDEX_MMAP
+        stats["avg_load_ms"] = 1000 * stats["load_seconds"] / stats["misses"] if stats["misses"] else 0.0
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_index_cache = IndexCache(int(INDEX_CACHE_MB * 1e6))
+
+
+def get_cached_vector_store(load_dir: str, embeddings):
+    """
+    The vector store saved in `load_dir`, shared by every caller in this process.
+    """
+    return _index_cache.get(load_dir, embeddings)
+
+
+def invalidate_index_cache(load_dir: str | None = None):
+    _index_cache.invalidate(load_dir)
+
+
+def index_cache_metrics() -> dict:
+    return _index_cache.metrics()
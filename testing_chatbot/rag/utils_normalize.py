@@ -0,0 +1,132 @@
+import re
+import time
+from testing_chatbot.rag.utils_segments import TranscriptSegments
+
+
+# ================== TRANSCRIPT NORMALIZATION ==================
+# Auto-generated captions arrive as 2-3 second fragments, each carrying a
+# full-precision timestamp, plus [Music] markers, "um"/"uh" fillers and
+# rolling duplicates where a fragment repeats the tail of the previous one.
+# Before a transcript goes into a Gemini prompt it is cleaned and regrouped into
+# sentence-level segments with whole-second timestamps ("[754s] ..."), which
+# keeps every timestamp the topic/quiz schemas need at a fraction of the tokens.
+NOISE_PATTERN = re.compile(r'\[[^\]]*\]|♪+|>>')
+# "mm"/"hm" are also units (5 mm), so only hmm/mhm-style forms count as fillers
+FILLER_PATTERN = re.compile(r'\b(?:u+m+|u+h+|e+r+m+|h+mm+|m+-?h+m*)\b[,.]?\s*', re.IGNORECASE)
+SENTENCE_END_PATTERN = re.compile(r'(?<=[.?!])\s+')
+MAX_OVERLAP_WORDS = 20
+
+
+def clean_text(text: str) -> str:
+    """
+    Drop sound markers ([Music], ♪, >>) and filler words, collapse whitespace.
+    """
+    text = NOISE_PATTERN.sub(" ", text)
+    text = FILLER_PATTERN.sub("", text)
+    return " ".join(text.split())
+
+
+def _strip_overlap(previous: list[str], words: list[str]) -> list[str]:
+    """
+    Remove the longest prefix of `words` that repeats the tail of `previous`.
+    Single-word overlaps are kept ("that that", "very very" are real speech).
+    """
+    limit = min(len(previous), len(words), MAX_OVERLAP_WORDS)
+    tail = [w.lower() for w in previous[-limit:]]
+    head = [w.lower() for w in words[:limit]]
+    for size in range(limit, 1, -1):
+        if tail[-size:] == head[:size]:
+            return words[size:]
+    return words
+
+
+def normalize_segments(segments: TranscriptSegments, min_seconds: float = 10.0, max_seconds: float = 30.0) -> TranscriptSegments:
+    """
+    Clean fragments and merge them into sentence-level segments.
+
+    A segment is closed at the first sentence boundary once it spans at least
+    `min_seconds`, or unconditionally after `max_seconds` (auto-captions often
+    have no punctuation at all). When a boundary falls inside a fragment, the
+    start of the next sentence is interpolated from its character position.
+    """
+    merged = []
+    current, current_start = [], None
+    previous_words = []
+
+    def flush(end: float):
+        nonlocal current, current_start
+        if current:
+            merged.append((" ".join(current), current_start, max(end - current_start, 0.0)))
+        current, current_start = [], None
+
+    for text, start, duration in segments:
+        words = _strip_overlap(previous_words, clean_text(text).split())
+        if not words:
+            continue
+        previous_words = (previous_words + words)[-MAX_OVERLAP_WORDS:]
+        text = " ".join(words)
+        pieces = SENTENCE_END_PATTERN.split(text)
+        position = 0
+        for i, piece in enumerate(pieces):
+            piece_start = start + duration * position / len(text) if duration else start
+            position += len(piece) + 1
+            if current_start is None:
+                current_start = piece_start
+            elif piece_start - current_start >= max_seconds:
+                flush(piece_start)
+                current_start = piece_start
+            current.append(piece)
+            sentence_closed = i < len(pieces) - 1 or piece.endswith((".", "?", "!"))
+            if sentence_closed:
+                piece_end = start + duration * min(position, len(text)) / len(text) if duration else start
+                if piece_end - current_start >= min_seconds:
+                    flush(piece_end)
+    if current:
+        last = len(segments) - 1
+        flush(max(segments.end(last), current_start))
+    return TranscriptSegments.from_snippets(merged)
+
+
+def format_compact(segments: TranscriptSegments) -> str:
+    """
+    One "[754s] text" line per segment, timestamps rounded down to whole seconds.
+    """
+    return "\n".join(f"[{int(start)}s] {text}" for text, start, _ in segments if text)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough Gemini token count without an API call: digits are tokenized one by
+    one, everything else averages about four characters per token.
+    """
+    digits = sum(ch.isdigit() for ch in text)
+    return digits + (len(text) - digits + 3) // 4
+
+
+def prepare_transcript(segments: TranscriptSegments, video_id: str | None = None, report: bool = True) -> tuple[str, dict]:
+    """
+    Normalize segments into the compact prompt text. Returns (text, stats) with
+    the token reduction against the legacy "text (start)" string.
+    """
+    started = time.perf_counter()
+    normalized = normalize_segments(segments)
+    text = format_compact(normalized)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    tokens_before = estimate_tokens(segments.to_caption_string())
+    tokens_after = estimate_tokens(text)
+    stats = {
+        "video_id": video_id,
+        "segments_before": len(segments),
+        "segments_after": len(normalized),
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "reduction": 1 - tokens_after / tokens_before if tokens_before else 0.0,
+        "normalize_ms": elapsed_ms,
+    }
+    if report:
+        print(
+            f"🧹 {video_id or 'transcript'}: {stats['segments_before']} → {stats['segments_after']} segments, "
+            f"~{tokens_before:,} → ~{tokens_after:,} tokens ({stats['reduction']:.0%} fewer) in {elapsed_ms:.1f} ms"
+        )
+    return text, stats
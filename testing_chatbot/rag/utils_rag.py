@@ -3,79 +3,132 @@ from testing_chatbot.rag.yt_rag_model import *
 import os
 import shutil
 from langchain_core.messages import HumanMessage
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from testing_chatbot.rag.utils_video_registry import get_thread_video_id
+from testing_chatbot.rag.utils_segments import TranscriptSegments
+from testing_chatbot.rag.utils_chunking import chunk_segments, format_chunk
+from testing_chatbot.rag.utils_embeddings import EMBEDDING_MODEL, get_embeddings
+from testing_chatbot.rag.utils_embedding_pipeline import build_vector_store
+from testing_chatbot.rag.utils_retrieval_cache import CachedRetriever
+from testing_chatbot.rag.utils_index_cache import (
+    get_cached_vector_store, load_vector_store, save_vector_store, saved_index_exists
+)
+from testing_chatbot.rag.utils_background_writer import flush_background_writes
+from testing_chatbot.rag.utils_shared_index import SharedIndexRetriever, get_video_index, is_video_indexed
 
 # ================== TEXT SPLITTING ==================
-def text_splitter(transcript: str):
+def text_splitter(transcript: str | TranscriptSegments, video_id: str | None = None):
     """
-    Splits transcript text into chunks for embeddings.
+    Splits a transcript into chunks for embeddings, on segment boundaries and
+    with start/end times in each chunk's metadata (see utils_chunking).
+    Accepts the segment store or a "text (start)" caption string.
     """
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    return splitter.create_documents([transcript])
+    if not isinstance(transcript, TranscriptSegments):
+        transcript = TranscriptSegments.from_caption_string(transcript)
+    return chunk_segments(transcript, video_id=video_id)
 
 # ================== EMBEDDINGS & RETRIEVER ==================
 def generate_embeddings(chunks):
     """
-    Generate FAISS embeddings from transcript chunks.
+    Generate FAISS embeddings from transcript chunks (a list or any iterable),
+    batched through the embedding pipeline (see utils_embedding_pipeline).
     """
-    embeddings = HuggingFaceEmbeddings(
-        model_name='sentence-transformers/all-MiniLM-L6-v2',
-        model_kwargs={"device": "cpu"}  # ✅ Force CPU
-    )
-    return FAISS.from_documents(chunks, embeddings)
+    return build_vector_store(chunks)
 
 
-def retriever_docs(vector_store):
+def retriever_docs(vector_store, thread_id: str | None = None, load_dir: str = ""):
     """
-    Convert FAISS vector store into a retriever.
+    Convert FAISS vector store into a retriever. Repeat questions in the same
+    thread are answered from the retrieval cache (see utils_retrieval_cache).
+    Pass the store's `load_dir` so the retriever follows later saves into it.
     """
-    return vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 3})
+    return CachedRetriever(vectorstore=vector_store, search_type="similarity", search_kwargs={"k": 3},
+                           cache_key=thread_id or "", load_dir=load_dir)
 
 
 def format_docs(retrieved_docs):
     """
     Format retrieved docs into a single string.
     """
-    return "\n\n".join(doc.page_content for doc in retrieved_docs)
+    return "\n\n".join(format_chunk(doc) for doc in retrieved_docs)
 
 
 def save_embeddings_faiss(thread_id: str, vector_store):
     """
-    Save FAISS embeddings locally for a given thread.
+    Save FAISS embeddings locally for a given thread
+    (quantized on disk if FAISS_QUANTIZATION is set, see utils_faiss_quantize).
     """
     save_dir = f"faiss_indexes/{thread_id}"
     os.makedirs("faiss_indexes", exist_ok=True)
-    vector_store.save_local(save_dir)
+    save_vector_store(vector_store, save_dir)
     print(f"✅ Embeddings for {thread_id} saved at {save_dir}")
 
 
-def load_embeddings_faiss(thread_id: str):
+def vector_store_from_video_index(video_id: str):
+    """
+    A private, writable FAISS store holding a video's chunks and vectors from
+    the video index (nothing is re-embedded), or None if it isn't indexed.
+    """
+    documents, vectors = get_video_index().export_video(video_id)
+    if not documents:
+        return None
+    return FAISS.from_embeddings(
+        [(doc.page_content, vector.tolist()) for doc, vector in zip(documents, vectors)],
+        get_embeddings(), metadatas=[doc.metadata for doc in documents]
+    )
+
+
+def index_video_shared(video_id: str, chunks) -> int:
+    """
+    Add a video's chunks to the shared index (see utils_shared_index); a no-op
+    when the same chunks are already there, and only new chunks are embedded
+    when they changed. Returns the number indexed.
+    """
+    return get_video_index().add_video(video_id, chunks)
+
+
+def video_retriever(video_id: str, thread_id: str | None = None):
+    """
+    Retriever over one video in the shared index, with the thread's retrieval cache.
+    """
+    return SharedIndexRetriever(video_ids=[video_id], cache_key=thread_id or "")
+
+
+def load_embeddings_faiss(thread_id: str, writable: bool = False):
     """
     Load FAISS embeddings for a given thread.
+    Threads created before the video registry have their own index directory;
+    newer threads search their video in the shared index, which is already in
+    memory, so nothing is deserialized.
+    Directories are memory-mapped and shared through the index LRU (see
+    utils_index_cache); pass writable=True to get a private copy to add to.
     """
     load_dir = f"faiss_indexes/{thread_id}"
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2",
-        model_kwargs={"device": "cpu"}
-    )
+    if not saved_index_exists(load_dir, EMBEDDING_MODEL):
+        video_id = get_thread_video_id(thread_id)
+        if video_id and is_video_indexed(video_id):
+            print(f"✅ Retriever for {thread_id} uses video {video_id} in the shared index")
+            return video_retriever(video_id, thread_id)
+    embeddings = get_embeddings()
 
-    if os.path.exists(load_dir):
-        vector_store = FAISS.load_local(
-            load_dir, embeddings, allow_dangerous_deserialization=True
-        )
-        retriever = retriever_docs(vector_store=vector_store)
+    if saved_index_exists(load_dir, EMBEDDING_MODEL):
+        if writable:
+            vector_store = load_vector_store(load_dir, embeddings, writable=True)
+        else:
+            vector_store = get_cached_vector_store(load_dir, embeddings)
+        # A writable copy is the caller's to add to; a shared one follows later saves
+        retriever = retriever_docs(vector_store=vector_store, thread_id=thread_id, load_dir="" if writable else load_dir)
         print(f"✅ Retriever for {thread_id} loaded from {load_dir}")
         return retriever
     else:
-        raise FileNotFoundError(f"❌ No FAISS index found for thread_id={thread_id} at {load_dir}")
+        raise FileNotFoundError(f"❌ No FAISS index built with {EMBEDDING_MODEL} for thread_id={thread_id} at {load_dir}")
 
 def clear_faiss_indexes(base_dir: str = "faiss_indexes"):
     """
     Deletes all files and subfolders inside faiss_indexes,
     but keeps the faiss_indexes folder itself.
     """
+    flush_background_writes()  # or a pending save would recreate what we delete
     if os.path.exists(base_dir):
         for item in os.listdir(base_dir):
             item_path = os.path.join(base_dir, item)
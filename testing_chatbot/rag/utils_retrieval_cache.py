@@ -0,0 +1,121 @@
+import os
+import threading
+from collections import OrderedDict
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStoreRetriever
+from testing_chatbot.rag.utils_embeddings import normalize_query
+from testing_chatbot.rag.utils_index_cache import get_cached_vector_store, saved_index_exists
+
+
+# ================== RETRIEVAL RESULT CACHE ==================
+# Students ask the same questions again and again. Per chat thread we keep
+# (normalized question, k) -> what the search returned (the chunks themselves
+# for a FAISS store, vector IDs for the shared index, which then reads just
+# those rows), so a repeat turn skips both the query encode and the search.
+# Entries belong to one version of the thread's index (chunk store generation,
+# vector count, first/last docstore ID): a rebuilt index or chunks appended by
+# live ingest change the version and drop the thread's entries.
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "256"))  # entries per thread, 0 = off
+
+_thread_caches = {}
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def index_version(vector_store) -> tuple:
+    ids = vector_store.index_to_docstore_id
+    total = vector_store.index.ntotal
+    # Chunk store IDs are positions, so its generation tells saves apart
+    store_id = getattr(vector_store.docstore, "store_id", None)
+    return (store_id, total, ids.get(0), ids.get(total - 1)) if total else (store_id, 0)
+
+
+def _thread_cache(cache_key: str, version: tuple) -> OrderedDict:
+    """
+    The thread's result cache for this index version (callers hold _cache_lock).
+    """
+    cached = _thread_caches.get(cache_key)
+    if cached is None or cached[0] != version:
+        if cached is not None:
+            _stats["invalidations"] += 1
+        cached = (version, OrderedDict())
+        _thread_caches[cache_key] = cached
+    return cached[1]
+
+
+def invalidate_retrieval_cache(cache_key: str | None = None):
+    """
+    Drop cached results for one thread, or for every thread.
+    """
+    with _cache_lock:
+        if cache_key is None:
+            _thread_caches.clear()
+        else:
+            _thread_caches.pop(cache_key, None)
+
+
+def retrieval_cache_metrics() -> dict:
+    with _cache_lock:
+        stats = dict(_stats)
+        stats["threads"] = len(_thread_caches)
+        stats["entries"] = sum(len(results) for _, results in _thread_caches.values())
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+def cached_search(cache_key: str, version: tuple, query: str, k: int, search) -> list:
+    """
+    What `query` retrieved last time in this thread and index version, else
+    search(query, k), remembered for next time.
+    """
+    key = (normalize_query(query), k)
+    if RETRIEVAL_CACHE_SIZE:
+        with _cache_lock:
+            results = _thread_cache(cache_key, version)
+            ids = results.get(key)
+            if ids is not None:
+                results.move_to_end(key)
+                _stats["hits"] += 1
+                return ids
+            _stats["misses"] += 1
+    ids = search(query, k)
+    if RETRIEVAL_CACHE_SIZE:
+        with _cache_lock:
+            results = _thread_cache(cache_key, version)
+            results[key] = ids
+            while len(results) > RETRIEVAL_CACHE_SIZE:
+                results.popitem(last=False)
+    return ids
+
+
+class CachedRetriever(VectorStoreRetriever):
+    """
+    FAISS similarity retriever that remembers which chunks each question
+    returned in this thread (see retriever_docs). With `load_dir` it follows
+    that directory: each query uses the store currently saved there (from the
+    index LRU), so a retriever kept in a session outlives later saves.
+    """
+    cache_key: str = ""
+    load_dir: str = ""
+
+    def _current_store(self):
+        if self.load_dir and saved_index_exists(self.load_dir):
+            self.vectorstore = get_cached_vector_store(self.load_dir, self.vectorstore.embedding_function)
+        return self.vectorstore
+
+    def _search(self, query: str, k: int) -> list[Document]:
+        # The store's own search path (its normalization and distance strategy);
+        # the query vector comes from the shared model, so it is query-cached too
+        store = self.vectorstore
+        embedding = store.embedding_function.embed_query(query)
+        return [doc for doc, _ in store.similarity_search_with_score_by_vector(embedding, k)]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun, **kwargs) -> list[Document]:
+        search_kwargs = self.search_kwargs | kwargs
+        if self.search_type != "similarity" or set(search_kwargs) - {"k"}:
+            return super()._get_relevant_documents(query, run_manager=run_manager, **kwargs)
+        store = self._current_store()
+        return cached_search(self.cache_key or str(id(store.index)), index_version(store), query,
+                             search_kwargs.get("k", 4), self._search)
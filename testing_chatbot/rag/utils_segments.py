@@ -0,0 +1,117 @@
+import re
+from array import array
+
+
+# ================== CAPTION STRING PARSER ==================
+# A timestamp is a bare number in parentheses that stands on its own, e.g.
+# "some words (12.34) more words". Requiring whitespace (or the string edge) on
+# both sides keeps captions such as "f(3)" or "(laughs)" inside the text, and
+# the pattern has no lazy ".*?" prefix, so finditer scans the input once.
+# The left-hand check is done in Python: a regex lookbehind is ~3x slower here.
+TIMESTAMP_PATTERN = re.compile(r'\((\d+(?:\.\d+)?)\)(?!\S)')
+
+
+def iter_caption_segments(transcript: str):
+    """
+    Stream (text, start_time, end_time) tuples out of a "text (start)" string.
+
+    Single pass with one segment of lookahead: end_time is the start of the
+    next timestamp, or None for the last one. Empty text segments are skipped.
+    """
+    pending = None
+    position = 0
+    for match in TIMESTAMP_PATTERN.finditer(transcript):
+        if match.start() and not transcript[match.start() - 1].isspace():
+            continue
+        start = float(match.group(1))
+        if pending is not None:
+            yield pending[0], pending[1], start
+        text = transcript[position:match.start()].strip()
+        pending = (text, start) if text else None
+        position = match.end()
+    if pending is not None:
+        yield pending[0], pending[1], None
+
+
+# ================== SEGMENT STORE ==================
+class TranscriptSegments:
+    """
+    Compact, columnar store of transcript segments.
+
+    Starts and durations live in parallel float arrays and every segment's text
+    is a slice of one shared buffer, addressed by offsets. Built once at fetch
+    time and passed through the pipeline instead of a "text (12.34)" string.
+    """
+    __slots__ = ("starts", "durations", "offsets", "buffer")
+
+    def __init__(self, starts: array, durations: array, offsets: array, buffer: str):
+        self.starts = starts
+        self.durations = durations
+        self.offsets = offsets
+        self.buffer = buffer
+
+    @classmethod
+    def from_snippets(cls, snippets) -> "TranscriptSegments":
+        """
+        Build the store from (text, start, duration) items.
+        """
+        starts, durations, offsets = array("d"), array("d"), array("q", [0])
+        parts = []
+        position = 0
+        for text, start, duration in snippets:
+            text = text.strip()
+            parts.append(text)
+            position += len(text)
+            starts.append(float(start))
+            durations.append(float(duration or 0.0))
+            offsets.append(position)
+        return cls(starts, durations, offsets, "".join(parts))
+
+    @classmethod
+    def from_caption_string(cls, transcript: str) -> "TranscriptSegments":
+        """
+        Build the store from a legacy "text (start)" string (e.g. captions saved in the DB).
+        """
+        return cls.from_snippets(
+            (text, start, (end - start) if end is not None else 0.0)
+            for text, start, end in iter_caption_segments(transcript)
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self):
+        """
+        Yield (text, start, duration) tuples.
+        """
+        buffer, offsets = self.buffer, self.offsets
+        for i in range(len(self.starts)):
+            yield buffer[offsets[i]:offsets[i + 1]], self.starts[i], self.durations[i]
+
+    def text(self, i: int) -> str:
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]]
+
+    def start(self, i: int) -> float:
+        return self.starts[i]
+
+    def end(self, i: int) -> float:
+        return self.starts[i] + self.durations[i]
+
+    @property
+    def duration(self) -> float:
+        """
+        Length of the video covered by the transcript, in seconds.
+        """
+        return self.end(len(self) - 1) if len(self) else 0.0
+
+    def to_caption_string(self) -> str:
+        """
+        Legacy "text (start)" format used by the chat and quiz prompts.
+        """
+        return " ".join(f"{text} ({start})" for text, start, _ in self)
+
+    def format_for_llm(self) -> str:
+        """
+        One "[start s] text" line per non-empty segment.
+        """
+        return "\n".join(f"[{start}s] {text}" for text, start, _ in self if text)
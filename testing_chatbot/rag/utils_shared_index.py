@@ -0,0 +1,458 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+import faiss
+import numpy as np
+import xxhash
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from testing_chatbot.rag.utils_transcript import TRANSCRIPT_DB
+from testing_chatbot.rag.utils_embeddings import EMBEDDING_MODEL, get_embeddings
+from testing_chatbot.rag.utils_embedding_pipeline import embed_chunks
+from testing_chatbot.rag.utils_retrieval_cache import cached_search
+from testing_chatbot.rag.utils_index_cache import INDEX_MMAP, read_index
+from testing_chatbot.rag.utils_faiss_quantize import FAISS_QUANTIZATION, quantize_id_mapped_index
+from testing_chatbot.rag.utils_background_writer import persist_in_background
+
+
+# ================== SHARED MULTI-TENANT INDEX ==================
+# One FAISS index for every video instead of one directory per conversation.
+# Each video's chunks get a contiguous block of vector IDs (IndexIDMap2), so
+# "only this video" is an ID range and threads on the same lecture share its
+# vectors: memory grows with distinct videos, and opening a thread costs a
+# registry lookup, not an index load. Chunk text/metadata live in SQLite
+# (`shared_index_chunks`) keyed by vector ID and are read for the top-k only.
+#
+# The index type follows the number of live vectors:
+#   < SHARED_INDEX_HNSW_MIN            Flat (exact)
+#   < SHARED_INDEX_IVF_MIN             HNSW32
+#   otherwise                          IVF (4*sqrt(n) lists), SHARED_INDEX_NPROBE probed
+# and is rebuilt from its own vectors when it crosses a threshold or when more
+# than half of it is superseded chunk sets. Searches restricted to at most
+# EXACT_SEARCH_MAX vectors (one or a few videos) are exact over just those
+# vectors; larger filters go through the ANN index with an ID selector.
+#
+# IDs are allocated in SQLite, so bulk_ingest and the app never collide; the
+# index file is memory-mapped for searching, reloaded when another process has
+# rewritten it (written to a temp file and renamed over, on the background
+# writer so adding a video doesn't wait for the file), and a video whose
+# vectors are missing from the loaded index is simply embedded again.
+# Embedding a video happens outside the index lock, so a long lecture being
+# indexed doesn't stall retrieval for every other chat.
+#
+# The file is stored per FAISS_QUANTIZATION like the per-thread indexes (see
+# utils_faiss_quantize); the process that adds vectors keeps its float32 copy
+# in memory, and one that loads a quantized file searches and appends to it
+# as is.
+#
+# Vectors from different embedding models can't share an index: each model has
+# its own index file (faiss_indexes/_shared/<model>/) and the registry records
+# the model, so after switching EMBEDDING_MODEL a video counts as not indexed
+# and is rebuilt instead of being searched with incompatible query vectors.
+#
+# VECTOR_BACKEND=sqlite-vec keeps the same index inside ragDatabase.db instead
+# (see utils_sqlite_vec); get_video_index() returns whichever is configured.
+SHARED_INDEX_DIR = "faiss_indexes/_shared"
+SHARED_INDEX_HNSW_MIN = int(os.getenv("SHARED_INDEX_HNSW_MIN", "50000"))
+SHARED_INDEX_IVF_MIN = int(os.getenv("SHARED_INDEX_IVF_MIN", "1000000"))
+SHARED_INDEX_NPROBE = int(os.getenv("SHARED_INDEX_NPROBE", "32"))
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "faiss")  # or "sqlite-vec"
+HNSW_EF_SEARCH = 64
+EXACT_SEARCH_MAX = 20000
+
+
+def _connect():
+    conn = sqlite3.connect(database=TRANSCRIPT_DB, timeout=30, check_same_thread=False)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS shared_index_videos (
+        video_id TEXT PRIMARY KEY,
+        chunk_set TEXT,
+        first_id INTEGER,
+        chunk_count INTEGER,
+        created_at TIMESTAMP,
+        model TEXT
+    )
+    """)
+    if "model" not in {row[1] for row in conn.execute("PRAGMA table_info(shared_index_videos)")}:
+        # Rows registered before the model was recorded match no model and are rebuilt
+        conn.execute("ALTER TABLE shared_index_videos ADD COLUMN model TEXT")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS shared_index_chunks (
+        vector_id INTEGER PRIMARY KEY,
+        video_id TEXT,
+        text TEXT,
+        metadata TEXT
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS shared_index_state (
+        key TEXT PRIMARY KEY,
+        value INTEGER
+    )
+    """)
+    return conn
+
+
+def model_slug(model_name: str) -> str:
+    return re.sub(r"\W", "_", model_name)
+
+
+def chunk_set_digest(chunks: list[Document]) -> str:
+    digest = xxhash.xxh64()
+    for chunk in chunks:
+        digest.update((chunk.metadata.get("chunk_hash") or chunk.page_content).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def load_video_ranges(video_ids: list[str] | None = None, model_name: str = EMBEDDING_MODEL) -> dict[str, tuple[int, int]]:
+    """
+    video_id -> (first vector ID, chunk count), for the given videos or all of
+    them, among those indexed with `model_name`.
+    """
+    conn = _connect()
+    if video_ids is None:
+        rows = conn.execute("SELECT video_id, first_id, chunk_count FROM shared_index_videos WHERE model = ?",
+                            (model_name,)).fetchall()
+    else:
+        rows = conn.execute(
+            f"SELECT video_id, first_id, chunk_count FROM shared_index_videos WHERE model = ? AND video_id IN ({','.join('?' * len(video_ids))})",
+            (model_name, *video_ids)
+        ).fetchall()
+    conn.close()
+    return {video_id: (first_id, count) for video_id, first_id, count in rows}
+
+
+def load_shared_documents(vector_ids: list[int]) -> list[Document]:
+    """
+    Chunks for the given vector IDs, in the same order.
+    """
+    if not vector_ids:
+        return []
+    conn = _connect()
+    rows = conn.execute(
+        f"SELECT vector_id, text, metadata FROM shared_index_chunks WHERE vector_id IN ({','.join('?' * len(vector_ids))})",
+        vector_ids
+    ).fetchall()
+    conn.close()
+    by_id = {vector_id: Document(page_content=text, metadata=json.loads(metadata)) for vector_id, text, metadata in rows}
+    return [by_id[vector_id] for vector_id in vector_ids if vector_id in by_id]
+
+
+def _allocate_ids(conn, count: int) -> int:
+    """
+    Reserve `count` consecutive vector IDs (callers hold a write transaction).
+    """
+    row = conn.execute("SELECT value FROM shared_index_state WHERE key = 'next_id'").fetchone()
+    first_id = row[0] if row else 0
+    conn.execute("INSERT OR REPLACE INTO shared_index_state (key, value) VALUES ('next_id', ?)", (first_id + count,))
+    return first_id
+
+
+def index_description(live_vectors: int) -> str:
+    """
+    faiss.index_factory description for an index holding `live_vectors`.
+    """
+    if live_vectors < SHARED_INDEX_HNSW_MIN:
+        return "Flat"
+    if live_vectors < SHARED_INDEX_IVF_MIN:
+        return "HNSW32"
+    return f"IVF{int(4 * np.sqrt(live_vectors))},Flat"
+
+
+def _index_kind(description: str | None) -> str:
+    return (description or "").split(",")[0].rstrip("0123456789")
+
+
+class SharedVectorIndex:
+    """
+    The process-wide shared index of one embedding model (see get_shared_index).
+    """
+    def __init__(self, model_name: str = EMBEDDING_MODEL, index_dir: str = SHARED_INDEX_DIR):
+        self.model_name = model_name
+        self.path = os.path.join(index_dir, model_slug(model_name), "index.faiss")
+        self.index = None
+        self.description = None
+        self._mtime = None
+        self._mapped = False
+        self._lock = threading.RLock()
+
+    # ---------- persistence ----------
+    def _reload_if_changed(self, writable: bool = False):
+        """
+        Searches map the index file (shared with other processes, see
+        utils_index_cache); adding needs a private, writable copy.
+        """
+        mtime = os.stat(self.path).st_mtime_ns if os.path.exists(self.path) else None
+        if mtime != self._mtime or (writable and self._mapped):
+            self._mapped = bool(mtime) and INDEX_MMAP and not writable
+            self.index = read_index(self.path, mmap=self._mapped) if mtime else None
+            self.description = None
+            if self.index is not None:
+                inner = faiss.downcast_index(faiss.downcast_index(self.index).index)
+                self.description = ("HNSW32" if isinstance(inner, faiss.IndexHNSW)
+                                    else f"IVF{inner.nlist},Flat" if isinstance(inner, faiss.IndexIVF)
+                                    else "Flat")
+            self._mtime = mtime
+
+    def _write(self):
+        """
+        Runs on the background writer: snapshot the index under the lock,
+        quantize it and write it to a temp file without holding it, then
+        rename it over the index under the lock again (so a search can't
+        reload the file between the rename and recording its mtime).
+        """
+        with self._lock:
+            data = faiss.serialize_index(self.index)
+        if FAISS_QUANTIZATION != "none":
+            data = faiss.serialize_index(quantize_id_mapped_index(faiss.deserialize_index(data), FAISS_QUANTIZATION))
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            f.write(data.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with self._lock:
+            os.replace(tmp_path, self.path)
+            self._mtime = os.stat(self.path).st_mtime_ns
+
+    def _has_ids(self, first_id: int, count: int) -> bool:
+        if self.index is None or not count:
+            return False
+        try:
+            self.index.reconstruct(first_id)
+            self.index.reconstruct(first_id + count - 1)
+        except RuntimeError:
+            return False
+        return True
+
+    # ---------- building ----------
+    def _new_index(self, dim: int, description: str, train_vectors: np.ndarray | None = None):
+        index = faiss.index_factory(dim, f"IDMap2,{description}")
+        inner = faiss.downcast_index(faiss.downcast_index(index).index)
+        if isinstance(inner, faiss.IndexHNSW):
+            inner.hnsw.efSearch = HNSW_EF_SEARCH
+        if isinstance(inner, faiss.IndexIVF):
+            inner.make_direct_map()  # needed by reconstruct (exact searches, rebuilds)
+        if not index.is_trained:
+            index.train(train_vectors)
+        return index
+
+    def _rebuild(self, ranges: dict[str, tuple[int, int]], description: str):
+        ids = np.concatenate([np.arange(first, first + count, dtype=np.int64) for first, count in ranges.values()])
+        vectors = self.index.reconstruct_batch(ids)
+        index = self._new_index(self.index.d, description, vectors)
+        index.add_with_ids(vectors, ids)
+        self.index, self.description = index, description
+        print(f"🏗️ Shared index rebuilt as {description} with {len(ids)} vectors")
+
+    def _maybe_rebuild(self):
+        ranges = load_video_ranges(model_name=self.model_name)
+        live = sum(count for _, count in ranges.values())
+        description = index_description(live)
+        # IVF list counts drift with size; only a change of index kind forces a rebuild
+        if live and (_index_kind(description) != _index_kind(self.description) or self.index.ntotal > 2 * live):
+            self._rebuild(ranges, description)
+
+    def _already_indexed(self, video_id: str, digest: str) -> bool:
+        """
+        True if this exact chunk set is registered and its vectors are in the
+        (writable) index.
+        """
+        with self._lock:
+            self._reload_if_changed(writable=True)
+            conn = _connect()
+            row = conn.execute("SELECT chunk_set, first_id, chunk_count FROM shared_index_videos WHERE video_id = ? AND model = ?",
+                               (video_id, self.model_name)).fetchone()
+            conn.close()
+            return row is not None and row[0] == digest and self._has_ids(row[1], row[2])
+
+    def add_video(self, video_id: str, chunks, embeddings=None) -> int:
+        """
+        Index a video's chunks (any iterable) unless the same chunk set is
+        already in the index. Returns the number of chunks indexed.
+        """
+        documents = list(chunks)
+        digest = chunk_set_digest(documents)
+        if not documents or self._already_indexed(video_id, digest):
+            return 0
+
+        # A changed chunk set (revised captions, another chunker) keeps the
+        # vectors of every chunk whose chunk_hash is already indexed and embeds
+        # only the rest (those may still come out of the embedding cache)
+        old_documents, old_vectors = self.export_video(video_id)
+        known = {doc.metadata["chunk_hash"]: vector for doc, vector in zip(old_documents, old_vectors)
+                 if doc.metadata.get("chunk_hash")}
+        missing = [doc for doc in documents if doc.metadata.get("chunk_hash") not in known]
+        _, new_vectors, _ = embed_chunks(missing, embeddings or get_embeddings(self.model_name)) if missing else ([], [], None)
+        new_vectors = iter(new_vectors)
+        vectors = np.asarray([known[doc.metadata["chunk_hash"]] if doc.metadata.get("chunk_hash") in known else next(new_vectors)
+                              for doc in documents], dtype=np.float32)
+        if known:
+            print(f"♻️ Reused {len(documents) - len(missing)}/{len(documents)} chunk embeddings, embedded {len(missing)}")
+
+        with self._lock:
+            # Another thread or process may have indexed it while we were embedding
+            if self._already_indexed(video_id, digest):
+                return 0
+            conn = _connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                first_id = _allocate_ids(conn, len(documents))
+                conn.execute("DELETE FROM shared_index_chunks WHERE video_id = ?", (video_id,))
+                conn.executemany(
+                    "INSERT INTO shared_index_chunks (vector_id, video_id, text, metadata) VALUES (?, ?, ?, ?)",
+                    [(first_id + i, video_id, doc.page_content, json.dumps(doc.metadata)) for i, doc in enumerate(documents)]
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO shared_index_videos (video_id, chunk_set, first_id, chunk_count, created_at, model) VALUES (?, ?, ?, ?, ?, ?)",
+                    (video_id, digest, first_id, len(documents), datetime.now(), self.model_name)
+                )
+            conn.close()
+
+            if self.index is None:
+                self.index = self._new_index(vectors.shape[1], "Flat")
+                self.description = "Flat"
+            # Superseded vectors of this video stay until the next rebuild (HNSW can't remove)
+            self.index.add_with_ids(vectors, np.arange(first_id, first_id + len(documents), dtype=np.int64))
+            self._maybe_rebuild()
+            # Searches use the in-memory index right away; later adds coalesce into the same write
+            persist_in_background(self.path, self._write)
+            print(f"✅ Video {video_id} added to the shared index ({len(documents)} chunks, {self.description})")
+            return len(documents)
+
+    # ---------- searching ----------
+    def search(self, query_vector, k: int, video_ids: list[str] | None = None) -> list[int]:
+        """
+        Vector IDs of the k nearest chunks, optionally only within `video_ids`.
+        """
+        with self._lock:
+            self._reload_if_changed()
+            if self.index is None:
+                return []
+            # Skip videos whose index write was lost (they are re-embedded on their next add)
+            ranges = {video_id: r for video_id, r in load_video_ranges(video_ids, self.model_name).items() if self._has_ids(*r)}
+            if not ranges:
+                return []
+            query = np.asarray([query_vector], dtype=np.float32)
+            live = sum(count for _, count in ranges.values())
+            if live <= EXACT_SEARCH_MAX:
+                ids = np.concatenate([np.arange(first, first + count, dtype=np.int64) for first, count in ranges.values()])
+                distances = ((self.index.reconstruct_batch(ids) - query) ** 2).sum(axis=1)
+                nearest = np.argsort(distances)[:k]
+                return [int(ids[i]) for i in nearest]
+
+            if len(ranges) == 1:
+                (first, count), = ranges.values()
+                selector = faiss.IDSelectorRange(first, first + count)
+            else:
+                ids = np.concatenate([np.arange(first, first + count, dtype=np.int64) for first, count in ranges.values()])
+                selector = faiss.IDSelectorBatch(ids)
+            inner = faiss.downcast_index(faiss.downcast_index(self.index).index)
+            if isinstance(inner, faiss.IndexHNSW):
+                params = faiss.SearchParametersHNSW(sel=selector, efSearch=HNSW_EF_SEARCH)
+            elif isinstance(inner, faiss.IndexIVF):
+                params = faiss.SearchParametersIVF(sel=selector, nprobe=SHARED_INDEX_NPROBE)
+            else:
+                params = faiss.SearchParameters(sel=selector)
+            _, labels = self.index.search(query, k, params=params)
+            return [int(label) for label in labels[0] if label != -1]
+
+    def documents(self, vector_ids: list[int]) -> list[Document]:
+        return load_shared_documents(vector_ids)
+
+    def export_video(self, video_id: str) -> tuple[list[Document], np.ndarray]:
+        """
+        A video's chunks and their vectors, in index order (empty if not indexed).
+        """
+        with self._lock:
+            self._reload_if_changed()
+            first, count = load_video_ranges([video_id], self.model_name).get(video_id, (0, 0))
+            if not self._has_ids(first, count):
+                return [], np.zeros((0, 0), dtype=np.float32)
+            vector_ids = np.arange(first, first + count, dtype=np.int64)
+            vectors = self.index.reconstruct_batch(vector_ids)
+        return load_shared_documents(vector_ids.tolist()), vectors
+
+    def is_indexed(self, video_id: str) -> bool:
+        """
+        Registered and present in the index (a crash can lose an index write
+        that hadn't landed yet; add_video then embeds the video again).
+        """
+        ranges = load_video_ranges([video_id], self.model_name)
+        if video_id not in ranges:
+            return False
+        with self._lock:
+            self._reload_if_changed()
+            return self._has_ids(*ranges[video_id])
+
+    def version(self, video_ids: list[str] | None = None) -> tuple:
+        """
+        Changes whenever one of the videos is re-indexed (retrieval cache key).
+        """
+        return tuple(sorted(load_video_ranges(video_ids, self.model_name).items()))
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._reload_if_changed()
+            ranges = load_video_ranges(model_name=self.model_name)
+            return {
+                "model": self.model_name,
+                "videos": len(ranges),
+                "live_vectors": sum(count for _, count in ranges.values()),
+                "stored_vectors": self.index.ntotal if self.index is not None else 0,
+                "index": self.description,
+            }
+
+
+_shared_index = None
+_shared_index_lock = threading.Lock()
+
+
+def get_shared_index() -> SharedVectorIndex:
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = SharedVectorIndex()
+        return _shared_index
+
+
+def get_video_index():
+    """
+    The index new chats use: this FAISS index, or with VECTOR_BACKEND=sqlite-vec
+    the same interface inside ragDatabase.db (see utils_sqlite_vec).
+    """
+    if VECTOR_BACKEND == "sqlite-vec":
+        from testing_chatbot.rag.utils_sqlite_vec import get_sqlite_vec_index
+
+        return get_sqlite_vec_index()
+    return get_shared_index()
+
+
+def is_video_indexed(video_id: str) -> bool:
+    return get_video_index().is_indexed(video_id)
+
+
+class SharedIndexRetriever(BaseRetriever):
+    """
+    Retriever over the video index (see get_video_index) restricted to some
+    videos (a thread's video, usually); repeat questions hit the retrieval cache.
+    """
+    video_ids: list[str]
+    k: int = 3
+    cache_key: str = ""
+
+    def _search_ids(self, query: str, k: int) -> list[int]:
+        query_vector = get_embeddings().embed_query(query)
+        return get_video_index().search(query_vector, k, self.video_ids)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun, **kwargs) -> list[Document]:
+        k = kwargs.get("k", self.k)
+        cache_key = self.cache_key or ",".join(self.video_ids)
+        index = get_video_index()
+        vector_ids = cached_search(cache_key, (VECTOR_BACKEND, index.version(self.video_ids)), query, k, self._search_ids)
+        return index.documents(vector_ids)
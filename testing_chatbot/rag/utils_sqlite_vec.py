@@ -0,0 +1,243 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+import numpy as np
+from langchain_core.documents import Document
+from testing_chatbot.rag.utils_transcript import TRANSCRIPT_DB
+from testing_chatbot.rag.utils_embeddings import EMBEDDING_MODEL, get_embeddings
+from testing_chatbot.rag.utils_embedding_pipeline import embed_chunks
+from testing_chatbot.rag.utils_shared_index import chunk_set_digest, model_slug
+
+
+# ================== SQLITE-VEC BACKEND ==================
+# The shared index (see utils_shared_index) kept inside ragDatabase.db instead
+# of faiss_indexes/, selected with VECTOR_BACKEND=sqlite-vec. Vectors sit in a
+# vec0 virtual table per embedding model, partitioned by video_id, next to
+# `vector_chunks` (text + metadata) and `vector_videos` (what is indexed).
+# Replacing a video's chunks is one transaction over all three, so vectors
+# can't drift from the rest of the database, and a KNN search is a single SQL
+# query over the video's partition:
+#   SELECT chunk_id, distance FROM vec_<model>
+#   WHERE embedding MATCH :query AND k = :k AND video_id = :video
+# There is nothing to load at startup. Needs an sqlite3 module built with
+# extension loading (python.org / conda builds are; some system Pythons aren't).
+VEC_TABLE_PREFIX = "vec_"
+
+
+def _vec_table(model_name: str) -> str:
+    return VEC_TABLE_PREFIX + model_slug(model_name)
+
+
+def _connect():
+    import sqlite_vec
+
+    conn = sqlite3.connect(database=TRANSCRIPT_DB, timeout=30, check_same_thread=False)
+    if not hasattr(conn, "enable_load_extension"):
+        conn.close()
+        raise RuntimeError("VECTOR_BACKEND=sqlite-vec needs a Python whose sqlite3 module can load extensions")
+    conn.enable_load_extension(True)
+    sqlite_vec.load(conn)
+    conn.enable_load_extension(False)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS vector_videos (
+        model TEXT,
+        video_id TEXT,
+        chunk_set TEXT,
+        chunk_count INTEGER,
+        created_at TIMESTAMP,
+        PRIMARY KEY (model, video_id)
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS vector_chunks (
+        chunk_id INTEGER PRIMARY KEY,
+        model TEXT,
+        video_id TEXT,
+        text TEXT,
+        metadata TEXT
+    )
+    """)
+    return conn
+
+
+def _create_vec_table(conn, model_name: str, dim: int):
+    conn.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {_vec_table(model_name)} USING vec0("
+        f"chunk_id INTEGER PRIMARY KEY, video_id TEXT PARTITION KEY, embedding float[{dim}])"
+    )
+
+
+def _has_vec_table(conn, model_name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (_vec_table(model_name),)).fetchone() is not None
+
+
+class SqliteVecIndex:
+    """
+    Same interface as SharedVectorIndex, backed by sqlite-vec (see get_video_index).
+    One connection per index, opened on first use (loading the extension and
+    creating the tables once) and used under the index lock.
+    """
+    def __init__(self, model_name: str = EMBEDDING_MODEL):
+        self.model_name = model_name
+        self.table = _vec_table(model_name)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self):
+        # Callers hold self._lock
+        if self._conn is None:
+            self._conn = _connect()
+        return self._conn
+
+    def _registry(self, conn, video_ids: list[str] | None = None) -> dict[str, tuple]:
+        query = "SELECT video_id, chunk_set, chunk_count, created_at FROM vector_videos WHERE model = ?"
+        params = [self.model_name]
+        if video_ids is not None:
+            query += f" AND video_id IN ({','.join('?' * len(video_ids))})"
+            params += video_ids
+        return {video_id: rest for video_id, *rest in conn.execute(query, params)}
+
+    def is_indexed(self, video_id: str) -> bool:
+        with self._lock:
+            return video_id in self._registry(self._db(), [video_id])
+
+    def add_video(self, video_id: str, chunks, embeddings=None) -> int:
+        """
+        Index a video's chunks (any iterable) unless the same chunk set is
+        already stored. Returns the number of chunks indexed.
+        """
+        documents = list(chunks)
+        with self._lock:
+            row = self._registry(self._db(), [video_id]).get(video_id)
+        if not documents or (row is not None and row[0] == chunk_set_digest(documents)):
+            return 0
+
+        # Vectors of chunks already stored for this video are reused, as in utils_shared_index
+        old_documents, old_vectors = self.export_video(video_id)
+        known = {doc.metadata["chunk_hash"]: vector for doc, vector in zip(old_documents, old_vectors)
+                 if doc.metadata.get("chunk_hash")}
+        missing = [doc for doc in documents if doc.metadata.get("chunk_hash") not in known]
+        _, new_vectors, _ = embed_chunks(missing, embeddings or get_embeddings(self.model_name)) if missing else ([], [], None)
+        new_vectors = iter(new_vectors)
+        vectors = np.asarray([known[doc.metadata["chunk_hash"]] if doc.metadata.get("chunk_hash") in known else next(new_vectors)
+                              for doc in documents], dtype=np.float32)
+        if known:
+            print(f"♻️ Reused {len(documents) - len(missing)}/{len(documents)} chunk embeddings, embedded {len(missing)}")
+
+        with self._lock:
+            conn = self._db()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                _create_vec_table(conn, self.model_name, vectors.shape[1])
+                conn.execute(f"DELETE FROM {self.table} WHERE video_id = ?", (video_id,))
+                conn.execute("DELETE FROM vector_chunks WHERE model = ? AND video_id = ?", (self.model_name, video_id))
+                first_id = conn.execute("SELECT COALESCE(MAX(chunk_id), -1) + 1 FROM vector_chunks").fetchone()[0]
+                chunk_ids = range(first_id, first_id + len(documents))
+                conn.executemany(
+                    "INSERT INTO vector_chunks (chunk_id, model, video_id, text, metadata) VALUES (?, ?, ?, ?, ?)",
+                    [(chunk_id, self.model_name, video_id, doc.page_content, json.dumps(doc.metadata))
+                     for chunk_id, doc in zip(chunk_ids, documents)]
+                )
+                conn.executemany(
+                    f"INSERT INTO {self.table} (chunk_id, video_id, embedding) VALUES (?, ?, ?)",
+                    [(chunk_id, video_id, vector.tobytes()) for chunk_id, vector in zip(chunk_ids, vectors)]
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO vector_videos (model, video_id, chunk_set, chunk_count, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (self.model_name, video_id, chunk_set_digest(documents), len(documents), datetime.now())
+                )
+        print(f"✅ Video {video_id} stored in sqlite-vec ({len(documents)} chunks)")
+        return len(documents)
+
+    def search(self, query_vector, k: int, video_ids: list[str] | None = None) -> list[int]:
+        """
+        Chunk IDs of the k nearest chunks, optionally only within `video_ids`
+        (one partition-filtered KNN query per video, merged by distance).
+        """
+        query = np.asarray(query_vector, dtype=np.float32).tobytes()
+        knn = f"SELECT chunk_id, distance FROM {self.table} WHERE embedding MATCH ? AND k = ?"
+        with self._lock:
+            conn = self._db()
+            if not _has_vec_table(conn, self.model_name):
+                return []
+            if video_ids is None:
+                hits = conn.execute(knn, (query, k)).fetchall()
+            else:
+                hits = [hit for video_id in video_ids
+                        for hit in conn.execute(knn + " AND video_id = ?", (query, k, video_id)).fetchall()]
+        return [chunk_id for chunk_id, _ in sorted(hits, key=lambda hit: hit[1])[:k]]
+
+    def documents(self, chunk_ids: list[int]) -> list[Document]:
+        if not chunk_ids:
+            return []
+        with self._lock:
+            rows = self._db().execute(
+                f"SELECT chunk_id, text, metadata FROM vector_chunks WHERE chunk_id IN ({','.join('?' * len(chunk_ids))})",
+                chunk_ids
+            ).fetchall()
+        by_id = {chunk_id: Document(page_content=text, metadata=json.loads(metadata)) for chunk_id, text, metadata in rows}
+        return [by_id[chunk_id] for chunk_id in chunk_ids if chunk_id in by_id]
+
+    def export_video(self, video_id: str) -> tuple[list[Document], np.ndarray]:
+        """
+        A video's chunks and their vectors, in chunk order (empty if not indexed).
+        """
+        with self._lock:
+            conn = self._db()
+            rows = conn.execute(
+                f"SELECT chunk_id, embedding FROM {self.table} WHERE video_id = ? ORDER BY chunk_id", (video_id,)
+            ).fetchall() if _has_vec_table(conn, self.model_name) else []
+        if not rows:
+            return [], np.zeros((0, 0), dtype=np.float32)
+        chunk_ids = [chunk_id for chunk_id, _ in rows]
+        vectors = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows])
+        return self.documents(chunk_ids), vectors
+
+    def version(self, video_ids: list[str] | None = None) -> tuple:
+        with self._lock:
+            return tuple(sorted(self._registry(self._db(), video_ids).items()))
+
+    def stats(self) -> dict:
+        with self._lock:
+            registry = self._registry(self._db())
+        return {
+            "videos": len(registry),
+            "live_vectors": sum(count for _, count, _ in registry.values()),
+            "index": f"sqlite-vec ({self.table})",
+        }
+
+    def clear(self):
+        """
+        Drop every vec0 table (all models) and empty the chunk/registry tables.
+        """
+        with self._lock:
+            conn = self._db()
+            with conn:
+                tables = [row[0] for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ? AND sql LIKE 'CREATE VIRTUAL TABLE%'",
+                    (VEC_TABLE_PREFIX + "%",)
+                )]
+                for table in tables:
+                    conn.execute(f"DROP TABLE {table}")
+                conn.execute("DELETE FROM vector_chunks")
+                conn.execute("DELETE FROM vector_videos")
+
+
+_sqlite_vec_index = None
+_sqlite_vec_index_lock = threading.Lock()
+
+
+def get_sqlite_vec_index() -> SqliteVecIndex:
+    global _sqlite_vec_index
+    with _sqlite_vec_index_lock:
+        if _sqlite_vec_index is None:
+            _sqlite_vec_index = SqliteVecIndex()
+        return _sqlite_vec_index
+
+
+def clear_sqlite_vec():
+    """
+    Drop every vec0 table and the chunk/registry tables (used when all conversations are deleted).
+    """
+    get_sqlite_vec_index().clear()
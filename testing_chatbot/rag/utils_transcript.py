@@ -0,0 +1,160 @@
+import json
+import re
+import sqlite3
+from datetime import datetime
+from functools import lru_cache
+from testing_chatbot.rag.utils_segments import TranscriptSegments
+from testing_chatbot.rag.utils_transcript_providers import get_provider
+from testing_chatbot.rag.utils_normalize import prepare_transcript
+from testing_chatbot.rag.utils_transcript_guard import (
+    TranscriptUnavailable, classify_error, load_cached_failure, save_failure, clear_failure,
+)
+
+
+# ================== TRANSCRIPT SERVICE ==================
+# One place that fetches transcripts. Transcripts are cached on disk in
+# ragDatabase.db (shared by the Streamlit pages and the FastAPI process) and
+# in an in-process LRU in front of it, both keyed by the canonical video ID.
+# Cached snippets are zstd frames like the thread captions (plain JSON rows
+# from before still load; migrate_transcripts_to_zstd rewrites them).
+TRANSCRIPT_DB = "ragDatabase.db"
+DEFAULT_LANGUAGES = ("en", "hi")
+VIDEO_ID_PATTERN = r'(?:v=|\/)([0-9A-Za-z_-]{11})'
+
+
+def extract_video_id(url: str) -> str | None:
+    """
+    Return the canonical 11-char video ID for any YouTube URL (or a bare ID).
+    """
+    if not url:
+        return None
+    url = url.strip()
+    if re.fullmatch(r'[0-9A-Za-z_-]{11}', url):
+        return url
+    match = re.search(VIDEO_ID_PATTERN, url)
+    return match.group(1) if match else None
+
+
+def _connect():
+    conn = sqlite3.connect(database=TRANSCRIPT_DB, timeout=30, check_same_thread=False)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS transcript_cache (
+        video_id TEXT,
+        languages TEXT,
+        language_code TEXT,
+        snippets TEXT,
+        fetched_at TIMESTAMP,
+        PRIMARY KEY (video_id, languages)
+    )
+    """)
+    return conn
+
+
+def load_snippets_from_cache(video_id: str, languages: tuple = DEFAULT_LANGUAGES) -> list | None:
+    """
+    Load cached [text, start, duration] snippets for a video from the database.
+    """
+    # Imported here: utils_database imports this module
+    from testing_chatbot.rag.utils_database import decompress_captions
+
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT snippets FROM transcript_cache WHERE video_id = ? AND languages = ?",
+        (video_id, ",".join(languages))
+    )
+    row = cursor.fetchone()
+    snippets = json.loads(decompress_captions(cursor, row[0])) if row else None
+    conn.close()
+    return snippets
+
+
+def save_snippets_to_cache(video_id: str, languages: tuple, language_code: str, snippets: list):
+    """
+    Save fetched [text, start, duration] snippets for a video into the database,
+    zstd-compressed with the captions dictionary (see utils_database).
+    """
+    from testing_chatbot.rag.utils_database import compress_captions
+
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT OR REPLACE INTO transcript_cache (video_id, languages, language_code, snippets, fetched_at) VALUES (?, ?, ?, ?, ?)",
+        (video_id, ",".join(languages), language_code, compress_captions(cursor, json.dumps(snippets)), datetime.now())
+    )
+    conn.commit()
+    conn.close()
+
+
+def fetch_snippets(video_id: str, languages: tuple = DEFAULT_LANGUAGES) -> list:
+    """
+    Return transcript snippets as [text, start, duration] items.
+    Checks the on-disk cache first and only then the transcript provider
+    (live YouTube by default, see utils_transcript_providers).
+
+    Failures are cached too, with a TTL per failure class (utils_transcript_guard):
+    until it expires the cached TranscriptUnavailable is raised without a request.
+    """
+    provider = get_provider()
+    if provider.cacheable:
+        snippets = load_snippets_from_cache(video_id, languages)
+        if snippets is not None:
+            return snippets
+        failure = load_cached_failure(TRANSCRIPT_DB, video_id, languages)
+        if failure is not None:
+            raise failure
+    try:
+        language_code, snippets = provider.fetch(video_id, languages)
+    except TranscriptUnavailable:
+        # Open circuit / local throttle: a statement about the host, not this video
+        raise
+    except Exception as e:
+        error_class = classify_error(e)
+        if provider.cacheable and error_class:
+            # youtube_transcript_api errors carry a short `cause` inside a long help text
+            message = (getattr(e, "cause", None) or str(e)).strip().split("\n")[0]
+            save_failure(TRANSCRIPT_DB, video_id, languages, error_class, f"{type(e).__name__}: {message}")
+        raise
+    if provider.cacheable:
+        save_snippets_to_cache(video_id, languages, language_code, snippets)
+        clear_failure(TRANSCRIPT_DB, video_id, languages)
+    return snippets
+
+
+@lru_cache(maxsize=64)
+def fetch_segments(video_id: str, languages: tuple = DEFAULT_LANGUAGES) -> TranscriptSegments:
+    """
+    Return the transcript as a TranscriptSegments store, built once per video
+    and kept in an in-process LRU. Errors are raised (and therefore never cached).
+    """
+    return TranscriptSegments.from_snippets(fetch_snippets(video_id, languages))
+
+
+def load_segments(url: str) -> TranscriptSegments | None:
+    """
+    Fetch transcript segments for a YouTube video.
+    """
+    video_id = extract_video_id(url)
+    if video_id:
+        try:
+            return fetch_segments(video_id)
+        except Exception as e:
+            print(f"❌ Error fetching transcript: {e}")
+            return None
+
+
+def load_transcript(url: str) -> str | None:
+    """
+    Fetch transcript for a YouTube video.
+    """
+    segments = load_segments(url)
+    return segments.to_caption_string() if segments is not None else None
+
+
+def load_llm_transcript(url: str) -> str | None:
+    """
+    Fetch a transcript normalized for LLM prompts (topics, quiz, summary):
+    sentence-level "[754s] text" lines, see utils_normalize.
+    """
+    segments = load_segments(url)
+    return prepare_transcript(segments, video_id=extract_video_id(url))[0] if segments is not None else None
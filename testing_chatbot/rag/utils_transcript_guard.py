@@ -0,0 +1,242 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import requests
+from youtube_transcript_api import (
+    AgeRestricted, InvalidVideoId, NoTranscriptFound, RequestBlocked, TranscriptsDisabled,
+    VideoUnavailable, VideoUnplayable, YouTubeRequestFailed,
+)
+
+
+# ================== FAILURE CLASSES ==================
+# A failed fetch is cached per video with a TTL that depends on why it failed:
+# a video without en/hi captions will not grow them in the next minute, while
+# a network blip should be retried almost immediately. Override with
+# TRANSCRIPT_TTL_NO_TRANSCRIPT / _RATE_LIMITED / _NETWORK (seconds).
+NO_TRANSCRIPT = "no_transcript"
+RATE_LIMITED = "rate_limited"
+NETWORK = "network"
+FAILURE_TTLS = {
+    NO_TRANSCRIPT: float(os.getenv("TRANSCRIPT_TTL_NO_TRANSCRIPT", 24 * 3600)),
+    RATE_LIMITED: float(os.getenv("TRANSCRIPT_TTL_RATE_LIMITED", 600)),
+    NETWORK: float(os.getenv("TRANSCRIPT_TTL_NETWORK", 60)),
+}
+
+
+class TranscriptUnavailable(Exception):
+    """
+    Raised instead of calling YouTube while a cached failure (or an open circuit) is in effect.
+    """
+    def __init__(self, error_class: str, message: str, retry_in: float):
+        self.error_class = error_class
+        self.retry_in = retry_in
+        super().__init__(f"{error_class}: {message} (retry in {retry_in:.0f}s)")
+
+
+def classify_error(error: Exception) -> str | None:
+    """
+    Map a fetch exception to a failure class, or None for errors that should not be cached.
+    """
+    if isinstance(error, TranscriptUnavailable):
+        return error.error_class
+    if isinstance(error, (NoTranscriptFound, TranscriptsDisabled, VideoUnavailable, VideoUnplayable,
+                          AgeRestricted, InvalidVideoId)):
+        return NO_TRANSCRIPT
+    if isinstance(error, RequestBlocked):
+        return RATE_LIMITED
+    if isinstance(error, YouTubeRequestFailed):
+        return RATE_LIMITED if "429" in error.reason else NETWORK
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout, TimeoutError, ConnectionError)):
+        return NETWORK
+    return None
+
+
+# ================== NEGATIVE CACHE (SQLite) ==================
+def _connect(database: str):
+    conn = sqlite3.connect(database=database, timeout=30, check_same_thread=False)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS transcript_failures (
+        video_id TEXT,
+        languages TEXT,
+        error_class TEXT,
+        message TEXT,
+        failed_at TIMESTAMP,
+        expires_at REAL,
+        PRIMARY KEY (video_id, languages)
+    )
+    """)
+    return conn
+
+
+def load_cached_failure(database: str, video_id: str, languages: tuple) -> TranscriptUnavailable | None:
+    """
+    Return the still-valid cached failure for a video, if any.
+    """
+    conn = _connect(database)
+    row = conn.execute(
+        "SELECT error_class, message, expires_at FROM transcript_failures WHERE video_id = ? AND languages = ?",
+        (video_id, ",".join(languages))
+    ).fetchone()
+    conn.close()
+    if row and row[2] > time.time():
+        return TranscriptUnavailable(row[0], row[1], row[2] - time.time())
+    return None
+
+
+def save_failure(database: str, video_id: str, languages: tuple, error_class: str, message: str):
+    conn = _connect(database)
+    conn.execute(
+        "INSERT OR REPLACE INTO transcript_failures (video_id, languages, error_class, message, failed_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (video_id, ",".join(languages), error_class, message, datetime.now(), time.time() + FAILURE_TTLS[error_class])
+    )
+    conn.commit()
+    conn.close()
+
+
+def clear_failure(database: str, video_id: str, languages: tuple):
+    conn = _connect(database)
+    conn.execute("DELETE FROM transcript_failures WHERE video_id = ? AND languages = ?", (video_id, ",".join(languages)))
+    conn.commit()
+    conn.close()
+
+
+# ================== PER-HOST THROTTLING ==================
+class TokenBucket:
+    """
+    Allow `rate` requests per second with bursts of up to `capacity`.
+    """
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, max_wait: float) -> bool:
+        """
+        Take one token, sleeping up to `max_wait` seconds for it. False if none came in time.
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `threshold` consecutive rate-limit/network failures.
+    While open every call fails fast; after `cooldown` seconds one trial call
+    is let through (half-open) and its outcome closes or re-opens the circuit.
+    """
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def before_call(self) -> float:
+        """
+        Return 0 if the call may go ahead, otherwise the seconds until the next trial.
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return 0.0
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if remaining <= 0 and not self.trial_running:
+                self.trial_running = True
+                return 0.0
+            return max(remaining, 1.0)
+
+    def release_trial(self):
+        """
+        Give back a trial granted by before_call that never made its call.
+        """
+        with self.lock:
+            self.trial_running = False
+
+    def record(self, error_class: str | None):
+        """
+        Record the outcome of a call: None for success, else its failure class.
+        """
+        with self.lock:
+            self.trial_running = False
+            if error_class in (RATE_LIMITED, NETWORK):
+                self.failures += 1
+                if self.opened_at is not None or self.failures >= self.threshold:
+                    self.opened_at = time.monotonic()
+            else:
+                self.failures = 0
+                self.opened_at = None
+
+
+class HostGuard:
+    """
+    Token bucket + circuit breaker for one upstream host.
+    """
+    def __init__(self, host: str, rate: float, burst: float, max_wait: float, threshold: int, cooldown: float):
+        self.host = host
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(threshold, cooldown)
+        self.max_wait = max_wait
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Run fn under the host's throttle and breaker. Raises TranscriptUnavailable
+        (rate_limited) instead of calling when the circuit is open or the bucket stays empty.
+        """
+        # Breaker first: while the circuit is open callers fail fast and leave the tokens alone
+        retry_in = self.breaker.before_call()
+        if retry_in:
+            raise TranscriptUnavailable(RATE_LIMITED, f"circuit open for {self.host}", retry_in)
+        if not self.bucket.acquire(self.max_wait):
+            self.breaker.release_trial()
+            raise TranscriptUnavailable(RATE_LIMITED, f"local throttle for {self.host}", 1 / self.bucket.rate)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.breaker.record(classify_error(e))
+            raise
+        self.breaker.record(None)
+        return result
+
+
+_host_guards = {}
+_host_guards_lock = threading.Lock()
+
+
+def get_host_guard(host: str) -> HostGuard:
+    """
+    Process-wide guard per host, configured from TRANSCRIPT_RATE (requests/s),
+    TRANSCRIPT_BURST, TRANSCRIPT_MAX_WAIT (s), TRANSCRIPT_BREAKER_THRESHOLD and
+    TRANSCRIPT_BREAKER_COOLDOWN (s).
+    """
+    with _host_guards_lock:
+        if host not in _host_guards:
+            _host_guards[host] = HostGuard(
+                host,
+                rate=float(os.getenv("TRANSCRIPT_RATE", "2")),
+                burst=float(os.getenv("TRANSCRIPT_BURST", "5")),
+                max_wait=float(os.getenv("TRANSCRIPT_MAX_WAIT", "5")),
+                threshold=int(os.getenv("TRANSCRIPT_BREAKER_THRESHOLD", "5")),
+                cooldown=float(os.getenv("TRANSCRIPT_BREAKER_COOLDOWN", "60")),
+            )
+        return _host_guards[host]
@@ -0,0 +1,123 @@
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from youtube_transcript_api import YouTubeTranscriptApi
+from testing_chatbot.rag.utils_transcript_guard import get_host_guard
+
+
+# ================== TRANSCRIPT PROVIDERS ==================
+# Backend behind fetch_snippets(). Pick one with environment variables:
+#   TRANSCRIPT_PROVIDER=live|record|replay   (default: live)
+#   TRANSCRIPT_RECORD_DIR=transcript_recordings
+#   TRANSCRIPT_REPLAY_LATENCY=0.5            (seconds per fetch, replay only)
+# `record` fetches live and stores the snippets on disk; `replay` serves them
+# back with no network, so the whole pipeline can run offline and repeatably.
+DEFAULT_RECORD_DIR = "transcript_recordings"
+
+
+class TranscriptProvider(ABC):
+    """
+    Base class: fetch(video_id, languages) -> (language_code, [[text, start, duration], ...]).
+    """
+    name = "base"
+    # Only network-backed providers go through the on-disk transcript cache
+    cacheable = False
+
+    @abstractmethod
+    def fetch(self, video_id: str, languages: tuple) -> tuple[str, list]:
+        ...
+
+
+class YouTubeProvider(TranscriptProvider):
+    """
+    Live YouTube captions via youtube_transcript_api, throttled and
+    circuit-broken per host (see utils_transcript_guard).
+    """
+    name = "live"
+    cacheable = True
+    host = "www.youtube.com"
+
+    def fetch(self, video_id: str, languages: tuple) -> tuple[str, list]:
+        fetched = get_host_guard(self.host).call(YouTubeTranscriptApi().fetch, video_id, languages=list(languages))
+        return fetched.language_code, [[item.text, item.start, item.duration] for item in fetched.snippets]
+
+
+def _recording_path(record_dir: str, video_id: str, languages: tuple) -> str:
+    return os.path.join(record_dir, f"{video_id}.{'-'.join(languages)}.json")
+
+
+class RecordingProvider(TranscriptProvider):
+    """
+    Fetch through another provider and store every result under record_dir.
+    """
+    name = "record"
+
+    def __init__(self, inner: TranscriptProvider | None = None, record_dir: str = DEFAULT_RECORD_DIR):
+        self.inner = inner or YouTubeProvider()
+        self.record_dir = record_dir
+
+    def fetch(self, video_id: str, languages: tuple) -> tuple[str, list]:
+        language_code, snippets = self.inner.fetch(video_id, languages)
+        os.makedirs(self.record_dir, exist_ok=True)
+        path = _recording_path(self.record_dir, video_id, languages)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"video_id": video_id, "language_code": language_code, "snippets": snippets}, f)
+        os.replace(path + ".tmp", path)
+        return language_code, snippets
+
+
+class ReplayProvider(TranscriptProvider):
+    """
+    Serve recorded transcripts from record_dir, sleeping `latency` seconds per fetch.
+    """
+    name = "replay"
+
+    def __init__(self, record_dir: str = DEFAULT_RECORD_DIR, latency: float = 0.0):
+        self.record_dir = record_dir
+        self.latency = latency
+
+    def fetch(self, video_id: str, languages: tuple) -> tuple[str, list]:
+        path = _recording_path(self.record_dir, video_id, languages)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No recorded transcript for video_id={video_id} at {path}")
+        if self.latency:
+            time.sleep(self.latency)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return data["language_code"], data["snippets"]
+
+
+_provider = None
+
+
+def get_provider() -> TranscriptProvider:
+    """
+    Return the process-wide provider, building it from the environment on first use.
+    """
+    global _provider
+    if _provider is None:
+        mode = os.getenv("TRANSCRIPT_PROVIDER", "live").lower()
+        record_dir = os.getenv("TRANSCRIPT_RECORD_DIR", DEFAULT_RECORD_DIR)
+        if mode == "record":
+            _provider = RecordingProvider(record_dir=record_dir)
+        elif mode == "replay":
+            _provider = ReplayProvider(record_dir=record_dir, latency=float(os.getenv("TRANSCRIPT_REPLAY_LATENCY", "0")))
+        elif mode == "live":
+            _provider = YouTubeProvider()
+        else:
+            raise ValueError(f"Unknown TRANSCRIPT_PROVIDER={mode!r} (expected live, record or replay)")
+    return _provider
+
+
+def set_provider(provider: TranscriptProvider | None):
+    """
+    Override the provider for this process (None goes back to the environment setting).
+    Transcripts already held in the segments LRU came from the old provider and are dropped.
+    """
+    # Imported here: utils_transcript imports this module
+    from testing_chatbot.rag.utils_transcript import fetch_segments
+
+    global _provider
+    _provider = provider
+    fetch_segments.cache_clear()
@@ -0,0 +1,136 @@
+import sqlite3
+import threading
+from datetime import datetime
+from testing_chatbot.rag.utils_transcript import TRANSCRIPT_DB, extract_video_id
+
+
+# ================== VIDEO REGISTRY (SQLite) ==================
+# Expensive artifacts (topics, summary, quiz, FAISS index) belong to a video,
+# not to a conversation. `videos` is keyed by the canonical video ID, threads
+# point at it through `thread_videos`, and `video_artifacts` holds one value
+# per (video_id, kind). Ten threads on one lecture share one set of artifacts.
+_build_locks = {}
+_build_locks_guard = threading.Lock()
+
+
+def _connect():
+    conn = sqlite3.connect(database=TRANSCRIPT_DB, timeout=30, check_same_thread=False)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS videos (
+        video_id TEXT PRIMARY KEY,
+        youtube_url TEXT,
+        created_at TIMESTAMP
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS thread_videos (
+        thread_id TEXT PRIMARY KEY,
+        video_id TEXT,
+        FOREIGN KEY(video_id) REFERENCES videos(video_id)
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS video_artifacts (
+        video_id TEXT,
+        kind TEXT,
+        value TEXT,
+        created_at TIMESTAMP,
+        PRIMARY KEY (video_id, kind),
+        FOREIGN KEY(video_id) REFERENCES videos(video_id)
+    )
+    """)
+    return conn
+
+
+def register_video(youtube_url: str) -> str | None:
+    """
+    Make sure the video exists in the registry and return its canonical ID.
+    """
+    video_id = extract_video_id(youtube_url)
+    if video_id:
+        conn = _connect()
+        conn.execute(
+            "INSERT OR IGNORE INTO videos (video_id, youtube_url, created_at) VALUES (?, ?, ?)",
+            (video_id, youtube_url, datetime.now())
+        )
+        conn.commit()
+        conn.close()
+    return video_id
+
+
+def link_thread_to_video(thread_id: str, youtube_url: str) -> str | None:
+    """
+    Point a thread at the registry entry for its video. Returns the video ID.
+    """
+    video_id = register_video(youtube_url)
+    if video_id:
+        conn = _connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO thread_videos (thread_id, video_id) VALUES (?, ?)",
+            (thread_id, video_id)
+        )
+        conn.commit()
+        conn.close()
+    return video_id
+
+
+def get_thread_video_id(thread_id: str) -> str | None:
+    """
+    Video ID a thread refers to, if it has been linked.
+    """
+    conn = _connect()
+    row = conn.execute("SELECT video_id FROM thread_videos WHERE thread_id = ?", (thread_id,)).fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def load_video_artifact(video_id: str, kind: str) -> str | None:
+    """
+    Load a stored artifact (topics / summary / quiz) for a video.
+    """
+    conn = _connect()
+    row = conn.execute(
+        "SELECT value FROM video_artifacts WHERE video_id = ? AND kind = ?", (video_id, kind)
+    ).fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def save_video_artifact(video_id: str, kind: str, value: str):
+    """
+    Save an artifact for a video, replacing any previous one of the same kind.
+    """
+    conn = _connect()
+    conn.execute(
+        "INSERT OR REPLACE INTO video_artifacts (video_id, kind, value, created_at) VALUES (?, ?, ?, ?)",
+        (video_id, kind, value, datetime.now())
+    )
+    conn.commit()
+    conn.close()
+
+
+def load_thread_artifact(thread_id: str, kind: str) -> str | None:
+    """
+    Resolve thread -> video and load that video's artifact.
+    """
+    video_id = get_thread_video_id(thread_id)
+    return load_video_artifact(video_id, kind) if video_id else None
+
+
+def get_or_create_video_artifact(video_id: str, kind: str, build) -> str:
+    """
+    Return the stored artifact, or call build() once to create and save it.
+    Concurrent sessions in this process asking for the same artifact wait for
+    the first build instead of each calling the LLM.
+    """
+    value = load_video_artifact(video_id, kind)
+    if value is not None:
+        return value
+    with _build_locks_guard:
+        lock = _build_locks.setdefault((video_id, kind), threading.Lock())
+    with lock:
+        value = load_video_artifact(video_id, kind)
+        if value is None:
+            value = build()
+            save_video_artifact(video_id, kind, value)
+    return value
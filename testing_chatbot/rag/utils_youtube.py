@@ -1,5 +1,5 @@
-from youtube_transcript_api import YouTubeTranscriptApi
 from testing_chatbot.rag.yt_rag_model import * 
+from testing_chatbot.rag.utils_transcript import load_transcript, load_segments, load_llm_transcript, extract_video_id
 import re
 
 
@@ -25,19 +25,3 @@ def get_embed_url(url: str) -> str:
     
     return url  # fallback
 
-
-def load_transcript(url: str) -> str | None:
-    """
-    Fetch transcript for a YouTube video.
-    """
-    pattern = r'(?:v=|\/)([0-9A-Za-z_-]{11})'
-    match = re.search(pattern, url)
-    if match:
-        video_id = match.group(1)
-        try:
-            captions = YouTubeTranscriptApi().fetch(video_id,languages=['en','hi']).snippets
-            data = [f"{item.text} ({item.start})" for item in captions]
-            return " ".join(data)
-        except Exception as e:
-            print(f"❌ Error fetching transcript: {e}")
-            return None
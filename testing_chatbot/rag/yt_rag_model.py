@@ -14,6 +14,7 @@ from pydantic import BaseModel, Field
 from typing import TypedDict, Annotated
 import re
 import sqlite3
+from testing_chatbot.rag.utils_chunking import format_chunk
 from dotenv import load_dotenv
 load_dotenv()
 # ------------------ Structured Schema ------------------
@@ -95,7 +96,7 @@ def chat_node(state: ChatState, retriever):
     retrieved_chunks = retriever.get_relevant_documents(user_question)
 
     def format_docs(retrieved_docs):
-        return "\n\n".join(doc.page_content for doc in retrieved_docs)
+        return "\n\n".join(format_chunk(doc) for doc in retrieved_docs)
 
     context = format_docs(retrieved_chunks)
 
@@ -1,5 +1,5 @@
 import streamlit as st
-from model_quiz import QuizGenerator, load_transcript
+from model_quiz import QuizGenerator, load_llm_transcript
 from utils import get_embed_url , save_quiz_to_db ,load_quiz_from_db
 st.title("📹 TubeTalk.ai → Topics Extractor")
 
@@ -9,7 +9,7 @@ thread_id = st.text_input("Enter a unique Thread ID (for saving & retrieving):")
 # ✅ Cache transcript loading
 @st.cache_data
 def get_captions(youtube_url: str):
-    return load_transcript(youtube_url)
+    return load_llm_transcript(youtube_url)
 
 # ✅ Cache quiz generation
 @st.cache_resource
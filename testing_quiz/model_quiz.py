@@ -1,27 +1,12 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
-from youtube_transcript_api import YouTubeTranscriptApi
 from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
 from pydantic import BaseModel, Field
 from typing import List
-#rom testing_chatbot.rag.utils_youtube import load_transcript
-import re
+from testing_chatbot.rag.utils_transcript import load_transcript, load_llm_transcript
+from testing_chatbot.rag.utils_segments import TranscriptSegments
+from testing_chatbot.rag.utils_normalize import prepare_transcript
 from dotenv import load_dotenv
 load_dotenv()
-def load_transcript(url: str) -> str | None:
-    """
-    Fetch transcript for a YouTube video.
-    """
-    pattern = r'(?:v=|\/)([0-9A-Za-z_-]{11})'
-    match = re.search(pattern, url)
-    if match:
-        video_id = match.group(1)
-        try:
-            captions = YouTubeTranscriptApi().fetch(video_id,languages=['en','hi']).snippets
-            data = [f"{item.text} ({item.start})" for item in captions]
-            return " ".join(data)
-        except Exception as e:
-            print(f"❌ Error fetching transcript: {e}")
-            return None
 
 class Quiz(BaseModel):
     question: str = Field(description="A well-formed multiple-choice quiz question")
@@ -35,7 +20,10 @@ class QuizGenerator:
     def __init__(self):
         pass
     
-    def generate_quiz(self,transcripts : str):
+    def generate_quiz(self,transcripts : str | TranscriptSegments):
+        # Segments are normalized first (merged sentences, compact timestamps)
+        if isinstance(transcripts, TranscriptSegments):
+            transcripts, _ = prepare_transcript(transcripts)
         system_template = """You are QuizBot, an AI assistant that creates professional quizzes.
         Your task is to generate exactly 10 multiple-choice questions from the provided YouTube transcript.
         Each question must:
@@ -66,7 +54,7 @@ class QuizGenerator:
     
 if __name__ == "__main__":
     # Load transcript
-    captions = load_transcript("https://www.youtube.com/watch?v=s3KnSb9b4Pk")
+    captions = load_llm_transcript("https://www.youtube.com/watch?v=s3KnSb9b4Pk")
 
     # Initialize quiz generator
     quiz_gen = QuizGenerator()
@@ -4,6 +4,7 @@ import json
 from datetime import datetime
 from typing import Optional, Any
 from testing_quiz.model_quiz import QuizList
+from testing_chatbot.rag.utils_video_registry import load_thread_artifact
 # ================== UTILITIES ==================
 def get_embed_url(url: str) -> str:
     """Convert any YouTube URL into an embeddable format."""
@@ -48,6 +49,7 @@ def save_quiz_to_db(thread_id: str, quiz: str):
 def load_quiz_from_db(thread_id: str) -> Optional[QuizList]:
     """
     Load quiz from the database using thread_id.
+    Falls back to the quiz of the thread's video in the video registry.
     Returns a QuizList object if found, else None.
     """
     conn = sqlite3.connect(database="ragDatabase.db", check_same_thread=False)
@@ -60,6 +62,9 @@ def load_quiz_from_db(thread_id: str) -> Optional[QuizList]:
     
     result = cursor.fetchone()
     conn.close()
+    if not result:
+        artifact = load_thread_artifact(thread_id, "quiz")
+        result = (artifact,) if artifact else None
     
     if result:
         try:
@@ -1,7 +1,7 @@
 import streamlit as st
 import re
-from youtube_transcript_api import YouTubeTranscriptApi
 from model_langChain import *  # your summarizer module
+from testing_chatbot.rag.utils_transcript import load_segments
 
 st.title("TubeTalk.ai Summarizer")
 
@@ -19,22 +19,6 @@ def get_embed_url(url: str) -> str:
     return url  # fallback
 
 
-def load_transcript(url: str) -> str | None:
-    """
-    Fetch transcript for a YouTube video.
-    """
-    pattern = r'(?:v=|\/)([0-9A-Za-z_-]{11})'
-    match = re.search(pattern, url)
-    if match:
-        video_id = match.group(1)
-        try:
-            captions = YouTubeTranscriptApi().fetch(video_id,languages=['en','hi']).snippets
-            data = [f"{item.text} ({item.start})" for item in captions]
-            return " ".join(data)
-        except Exception as e:
-            print(f"❌ Error fetching transcript: {e}")
-            return None
-
 if 'generated' not in st.session_state:
     st.session_state['generated'] = False
 # ------------------- Input -------------------
@@ -47,24 +31,16 @@ if st.button("Generate Summary"):
 # ------------------- Summarize Button -------------------
 if st.session_state.generated:
     st.info("📥 Loading transcript...")
-    youtube_captions = load_transcript(input_url)
+    segments = load_segments(input_url)
 
-    if youtube_captions:
+    if segments:
         summarizer = YouTubeVideoSummarizer()
 
-        st.info("✂️ Parsing transcript...")
-        segments = summarizer.parse_transcript(youtube_captions)
-        st.success("✅ Parsed transcript successfully")
-
         # Optional: print first segment
-        if segments:
-            print(f"[{segments[0].start_time}s] {segments[0].text}")
-
-        st.info("📝 Formatting transcript...")
-        formatted = summarizer.format_transcript_for_llm(segments)
+        print(f"[{segments.start(0)}s] {segments.text(0)}")
 
         st.info("🤖 Generating summary with AI...")
-        response, parsed_output, summary = summarizer.summarize_video(youtube_captions)
+        response, parsed_output, summary = summarizer.summarize_video(segments)
 
         embed_url = get_embed_url(input_url)
 
@@ -9,6 +9,8 @@ from langchain.schema import BaseOutputParser
 from pydantic import BaseModel, Field
 import json
 from langchain_google_genai import ChatGoogleGenerativeAI
+from testing_chatbot.rag.utils_segments import TranscriptSegments, iter_caption_segments
+from testing_chatbot.rag.utils_normalize import prepare_transcript
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -66,25 +68,11 @@ class YouTubeVideoSummarizer:
         Returns:
             List of TimestampedSegment objects
         """
-        segments = []
-        
-        # Regular expression to find text and timestamps
-        # Pattern: captures text followed by timestamp in parentheses
-        pattern = r'(.*?)\((\d+\.?\d*)\)'
-        
-        matches = re.findall(pattern, transcript)
-        
-        for i, (text, timestamp) in enumerate(matches):
-            text = text.strip()
-            if text:  # Only add non-empty text segments
-                segment = TimestampedSegment(
-                    text=text,
-                    start_time=float(timestamp),
-                    end_time=float(matches[i+1][1]) if i+1 < len(matches) else None
-                )
-                segments.append(segment)
-        
-        return segments
+        # Single-pass, parenthesis-safe parser (see iter_caption_segments)
+        return [
+            TimestampedSegment(text=text, start_time=start, end_time=end)
+            for text, start, end in iter_caption_segments(transcript)
+        ]
     
     def format_transcript_for_llm(self, segments: List[TimestampedSegment]) -> str:
         """
@@ -135,25 +123,30 @@ class YouTubeVideoSummarizer:
         
         return ChatPromptTemplate.from_messages([system_message, human_message])
     
-    def summarize_video(self, transcript: str) -> Dict[str, Any]:
+    def summarize_video(self, transcript: str | TranscriptSegments) -> Dict[str, Any]:
         """
         Main method to summarize a video transcript
         
         Args:
-            transcript: Raw transcript string with timestamps
+            transcript: Raw transcript string with timestamps, or the
+                TranscriptSegments store from load_segments (skips re-parsing)
             
         Returns:
             Structured summary dictionary
         """
-        # Parse the transcript
-        segments = self.parse_transcript(transcript)
-        
-        if not segments:
+        if isinstance(transcript, TranscriptSegments):
+            segments = transcript
+            formatted_transcript, _ = prepare_transcript(segments)
+            video_duration = max(segments.starts) if len(segments) else 0
+        else:
+            # Parse the transcript
+            segments = self.parse_transcript(transcript)
+            formatted_transcript = self.format_transcript_for_llm(segments)
+            video_duration = max([s.start_time for s in segments]) if segments else 0
+        
+        if not len(segments):
             return {"error": "No valid transcript segments found"}
         
-        # Format for LLM
-        formatted_transcript = self.format_transcript_for_llm(segments)
-        
         # Create prompt
         prompt = self.create_summary_prompt()
         
@@ -171,7 +164,7 @@ class YouTubeVideoSummarizer:
             # Convert to dictionary and add metadata
             summary_dict = parsed_output.dict()
             summary_dict["total_segments"] = len(segments)
-            summary_dict["video_duration"] = max([s.start_time for s in segments]) if segments else 0
+            summary_dict["video_duration"] = video_duration
             
             return response , parsed_output , summary_dict
             
@@ -1,7 +1,7 @@
 # test_app.py
 import streamlit as st
 from dotenv import load_dotenv
-from test_model import load_transcript, generate_summary
+from test_model import load_llm_transcript, generate_summary
 from utlis_db import extract_topics_from_db , save_summary_to_db ,get_summary_if_exists
 # Load environment variables (Google credentials etc.)
 load_dotenv()
@@ -42,7 +42,7 @@ if st.button("🔎 Generate Summary"):
             transcript_text = ""
             if url_input.strip():
                 with st.spinner("Fetching transcript..."):
-                    transcript_text = load_transcript(url_input)
+                    transcript_text = load_llm_transcript(url_input)
                     if transcript_text is None:
                         st.error("❌ Could not fetch transcript for this video.")
                         transcript_text = ""
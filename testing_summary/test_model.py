@@ -1,6 +1,4 @@
 # test_model.py
-import re
-from youtube_transcript_api import YouTubeTranscriptApi
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.chains import LLMChain
@@ -8,22 +6,9 @@ from langchain.chains import LLMChain
 # -----------------------
 # 1) Transcript Loader
 # -----------------------
-def load_transcript(url: str) -> str | None:
-    """
-    Fetch transcript for a YouTube video.
-    """
-    pattern = r'(?:v=|\/)([0-9A-Za-z_-]{11})'
-    match = re.search(pattern, url)
-    if match:
-        video_id = match.group(1)
-        try:
-            captions = YouTubeTranscriptApi().fetch(video_id, languages=['en','hi']).snippets
-            data = [f"{item.text} ({item.start})" for item in captions]
-            return " ".join(data)
-        except Exception as e:
-            print(f"❌ Error fetching transcript: {e}")
-            return None
-    return None
+from testing_chatbot.rag.utils_transcript import load_transcript, load_llm_transcript
+from testing_chatbot.rag.utils_segments import TranscriptSegments
+from testing_chatbot.rag.utils_normalize import prepare_transcript
 
 # -----------------------
 # 2) Initialize LLM
@@ -54,6 +39,8 @@ def get_summarizer_chain():
 # -----------------------
 # 3) Generate Summary
 # -----------------------
-def generate_summary(transcript: str, topics: str) -> str:
+def generate_summary(transcript: str | TranscriptSegments, topics: str) -> str:
+    if isinstance(transcript, TranscriptSegments):
+        transcript, _ = prepare_transcript(transcript)
     chain = get_summarizer_chain()
     return chain.run({"transcript": transcript, "topics": topics})
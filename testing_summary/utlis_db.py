@@ -1,6 +1,7 @@
 import sqlite3
 from typing import Optional
 from pydantic import BaseModel, Field
+from testing_chatbot.rag.utils_video_registry import load_thread_artifact
 
 # Assume these are already defined
 class Subtopic(BaseModel):
@@ -31,6 +32,9 @@ def extract_topics_from_db(thread_id: str) -> str:
     cursor.execute("SELECT output_json FROM transcript_topics WHERE thread_id=? ORDER BY id DESC", (thread_id,))
     row = cursor.fetchone()
     conn.close()
+    if not row:
+        artifact = load_thread_artifact(thread_id, "topics")
+        row = (artifact,) if artifact else None
 
     if not row:
         return f"No topics found for thread_id '{thread_id}'."
@@ -89,7 +93,8 @@ import sqlite3
 
 def get_summary_if_exists(thread_id: str) -> str | None:
     """
-    Check if a summary for the given thread_id exists in the database.
+    Check if a summary for the given thread_id exists in the database
+    (or in the video registry, for the thread's video).
     Returns the summary string if found, else None.
     """
     conn = sqlite3.connect("ragDatabase.db", check_same_thread=False)
@@ -103,4 +108,4 @@ def get_summary_if_exists(thread_id: str) -> str | None:
     if row:
         return row[0][0]  # return the summary string
 
-    return None
+    return load_thread_artifact(thread_id, "summary")